@@ -1,38 +1,118 @@
 # api_clients.py
 
+# Provider SDKs (google.generativeai, openai, gtts, edge_tts, httpx) are imported
+# inside the clients that use them, so a process only loads the backends it is
+# configured for (see providers.py).
+
+import logging
 import os
 import requests
 from dotenv import load_dotenv
-import google.generativeai as genai
-import edge_tts
 import asyncio
-from openai import OpenAI # Import OpenAI's official client
+import queue
+import threading
+
+import metrics
+from outbound_governor import GovernorOverloaded, estimate_tokens, governor_for
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Placeholder texts the LLM clients return instead of raising.
+# They must never be cached or treated as real commentary.
+NO_COMMENTARY_MESSAGE = "No commentary generated."
+GEMINI_ERROR_MESSAGE = "Error generating commentary."
+OPENAI_ERROR_MESSAGE = "Commentary AI is temporarily unavailable."
+LLM_FALLBACK_RESPONSES = frozenset({NO_COMMENTARY_MESSAGE, GEMINI_ERROR_MESSAGE, OPENAI_ERROR_MESSAGE})
+
+
+class StreamInterrupted(Exception):
+    """Raised by a commentary stream that fails after it has already yielded part of the text."""
+
+# Completion size assumed for TPM accounting when a call sets no max_tokens
+DEFAULT_COMPLETION_TOKENS = 100
+
+
+def _llm_tokens(prompt: str, max_tokens: int = None) -> int:
+    """Tokens a call is charged against its provider's TPM quota: prompt estimate plus the completion cap."""
+    return estimate_tokens(prompt) + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
 class GeminiClient:
     def __init__(self):
+        import google.generativeai as genai
+
         self.api_key = os.getenv("GEMINI_API_KEY")
         genai.configure(api_key=self.api_key)
         # You can choose different models, e.g., 'gemini-1.5-flash', 'gemini-1.5-pro'
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        self.model_name = 'gemini-1.5-flash'
+        self.model = genai.GenerativeModel(self.model_name)
+        self.governor = governor_for("gemini")
 
-    def generate_commentary(self, prompt: str) -> str:
+    def generate_commentary(self, prompt: str, max_tokens: int = None) -> str:
         try:
-            print("---------------------------------------------------------------")
-            print(f"Generating Gemini commentary with prompt: {prompt}")
-            response = self.model.generate_content(prompt)
+            logger.debug("Generating Gemini commentary with prompt: %s", prompt)
+            generation_config = {"max_output_tokens": max_tokens} if max_tokens else None
+            with self.governor.slot(_llm_tokens(prompt, max_tokens)):
+                response = self.model.generate_content(prompt, generation_config=generation_config)
             # Check if response.text exists and is not empty
             if response.candidates and response.candidates[0].content.parts:
                 return response.candidates[0].content.parts[0].text
             else:
-                print(f"Warning: Gemini response had no text content for prompt: {prompt}")
-                return "No commentary generated."
+                logger.warning("Gemini response had no text content")
+                return NO_COMMENTARY_MESSAGE
         except Exception as e:
-            print(f"Error calling Gemini API: {e}")
+            logger.error("Error calling Gemini API: %s", e)
+            metrics.ERRORS.inc(component="gemini")
             # You might get errors if content is blocked or rate limited
-            return "Error generating commentary."
+            return GEMINI_ERROR_MESSAGE
+
+    def generate_commentary_stream(self, prompt: str):
+        """
+        Yields commentary text chunks as Gemini produces them,
+        so callers can show text before the full completion is ready.
+        """
+        produced = False
+        try:
+            logger.debug("Streaming Gemini commentary with prompt: %s", prompt)
+            # The slot is held until the stream ends, so streams count against the concurrency limit
+            with self.governor.slot(_llm_tokens(prompt)):
+                response = self.model.generate_content(prompt, stream=True)
+                for chunk in response:
+                    if chunk.candidates and chunk.candidates[0].content.parts:
+                        text = chunk.candidates[0].content.parts[0].text
+                        if text:
+                            produced = True
+                            yield text
+            if not produced:
+                logger.warning("Gemini stream had no text content")
+                yield NO_COMMENTARY_MESSAGE
+        except Exception as e:
+            logger.error("Error streaming from Gemini API: %s", e)
+            metrics.ERRORS.inc(component="gemini")
+            if not produced:
+                yield GEMINI_ERROR_MESSAGE
+            else:
+                # Appending a placeholder would pass the partial text off as a finished line
+                raise StreamInterrupted(str(e)) from e
+
+
+# Qloo lookups sit on the profile selection path, so never wait on them indefinitely
+QLOO_TIMEOUT_SECONDS = 5.0
+
+
+def style_profile(preference_type: str) -> dict:
+    """The taste profile for a commentary style, as the mocked Qloo lookup returns it."""
+    if preference_type == "analytical":
+        return {"style": "analytical", "focus": ["stats", "tactics", "efficiency"]}
+    elif preference_type == "emotional":
+        return {"style": "emotional", "focus": ["passion", "drama", "player_narratives"]}
+    elif preference_type == "humorous":
+        return {"style": "humorous", "focus": ["jokes", "lighthearted", "sarcasm"]}
+    else:
+        return {"style": "balanced", "focus": ["general", "key_moments"]}
 
 
 class QlooClient:
@@ -47,30 +127,22 @@ class QlooClient:
         self.api_key = os.getenv("QLOO_API_KEY")
         # Verify Qloo's actual API base URL from their documentation
         self.base_url = "https://hackathon.api.qloo.com" # This is a common pattern, but verify
+        # One pooled session for all lookups, so connections (and TLS handshakes) are reused
+        self.session = requests.Session()
+        self.session.headers.update(self._headers())
+        self._async_http = None
+        self.governor = governor_for("qloo")
 
-    def get_user_taste_profile(self, user_data: dict) -> dict:
+    def _mock_taste_profile(self, user_data: dict) -> dict:
         """
-        Fetches a user's taste profile from Qloo based on provided user data.
-        For a hackathon PoC, `user_data` might be a simple identifier or
-        a few example preferences.
+        Mocked Qloo response, used when the API key is missing or the API call fails.
+        In a real scenario, Qloo would analyze user data (e.g., content consumption, demographics)
+        to return a detailed taste profile.
+        We'll simulate mapping a simple 'preference_type' to a commentary style.
         """
-        if not self.api_key:
-            print("QLOO_API_KEY not set. Returning a mocked taste profile.")
-            # Mocked Qloo response for demonstration if API key is missing
-            # In a real scenario, Qloo would analyze user data (e.g., content consumption, demographics)
-            # to return a detailed taste profile.
-            # We'll simulate mapping a simple 'preference_type' to a commentary style.
-            preference_type = user_data.get("preference_type", "balanced")
-            if preference_type == "analytical":
-                return {"style": "analytical", "focus": ["stats", "tactics", "efficiency"]}
-            elif preference_type == "emotional":
-                return {"style": "emotional", "focus": ["passion", "drama", "player_narratives"]}
-            elif preference_type == "humorous":
-                return {"style": "humorous", "focus": ["jokes", "lighthearted", "sarcasm"]}
-            else:
-                return {"style": "balanced", "focus": ["general", "key_moments"]}
-
+        return style_profile(user_data.get("preference_type", "balanced"))
 
+    def _headers(self) -> dict:
         # --- Placeholder for actual Qloo API call ---
         # You would replace this section with your actual Qloo API integration.
         # Example hypothetical API call (adjust based on Qloo's real documentation):
@@ -78,54 +150,81 @@ class QlooClient:
         #     "Authorization": f"Bearer {self.api_key}", # Or 'X-API-Key' depending on Qloo
         #     "Content-Type": "application/json"
         # }
-        headers = {
+        return {
             "accept": "application/json",
             "X-Api-Key": "836jxA0OzDhGEY5gURAVZorV3RgnSFugkJ7EOV8L5JU"
         }
-        # The payload structure will be defined by Qloo's API for taste profiles.
-        # It might involve sending user IDs, historical consumption data, etc.
-        payload = {
-            "user_identifier": user_data.get("user_id"),
-            "preferences": user_data.get("preferences", []) # e.g., [{"type": "movie", "value": "action"}]
-        }
-        
+
+    def _profile_from_response(self, qloo_response: dict) -> dict:
+        """
+        Process Qloo's response to extract a simplified taste profile for commentary.
+        This logic will depend heavily on the structure of Qloo's actual response.
+        For this PoC, we'll map some hypothetical Qloo output to our styles.
+        Example: if Qloo returns high affinity for 'analytical content', map to 'analytical'
+        This part needs to be tailored to actual Qloo output.
+        """
+        if "affinity_scores" in qloo_response:
+            # Example: Map Qloo's affinity scores to our commentary styles
+            if qloo_response["affinity_scores"].get("analytical_content", 0) > 0.7:
+                return {"style": "analytical", "focus": ["stats", "tactics"]}
+            elif qloo_response["affinity_scores"].get("drama_narratives", 0) > 0.7:
+                return {"style": "emotional", "focus": ["passion", "player_narratives"]}
+            elif qloo_response["affinity_scores"].get("comedy_genres", 0) > 0.7:
+                return {"style": "humorous", "focus": ["jokes", "lighthearted"]}
+        return {"style": "balanced", "focus": ["general", "key_moments"]} # Default if no strong affinity
+
+    def get_user_taste_profile(self, user_data: dict) -> dict:
+        """
+        Fetches a user's taste profile from Qloo based on provided user data.
+        For a hackathon PoC, `user_data` might be a simple identifier or
+        a few example preferences.
+        """
+        if not self.api_key:
+            logger.debug("QLOO_API_KEY not set. Returning a mocked taste profile.")
+            return self._mock_taste_profile(user_data)
+
         try:
-            print("---------------------------------------------------------------")
-            print(f"Fetching taste profile for user: {user_data.get('user_id')}")
-            response = requests.get(f"{self.base_url}/v2/audiences/types", headers=headers)
-            
-            response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
+            logger.debug("Fetching taste profile for user: %s", user_data.get('user_id'))
+            with self.governor.slot(), metrics.QLOO_LOOKUP_SECONDS.time():
+                response = self.session.get(f"{self.base_url}/v2/audiences/types", timeout=QLOO_TIMEOUT_SECONDS)
+                response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
+
             qloo_response = response.json()
-            print("qloo reponse", qloo_response)
-            # Process Qloo's response to extract a simplified taste profile for commentary
-            # This logic will depend heavily on the structure of Qloo's actual response.
-            # For this PoC, we'll map some hypothetical Qloo output to our styles.
-            # Example: if Qloo returns high affinity for 'analytical content', map to 'analytical'
-            # For now, we'll keep the mock-like mapping for the PoC for simplicity
-            # once a real Qloo response is received.
-            # This part needs to be tailored to actual Qloo output.
-            if "affinity_scores" in qloo_response:
-                # Example: Map Qloo's affinity scores to our commentary styles
-                if qloo_response["affinity_scores"].get("analytical_content", 0) > 0.7:
-                    return {"style": "analytical", "focus": ["stats", "tactics"]}
-                elif qloo_response["affinity_scores"].get("drama_narratives", 0) > 0.7:
-                    return {"style": "emotional", "focus": ["passion", "player_narratives"]}
-                elif qloo_response["affinity_scores"].get("comedy_genres", 0) > 0.7:
-                    return {"style": "humorous", "focus": ["jokes", "lighthearted"]}
-            return {"style": "balanced", "focus": ["general", "key_moments"]} # Default if no strong affinity
-
-        except requests.exceptions.RequestException as e:
-            print(f"Error calling Qloo API: {e}. Returning a mocked taste profile.")
+            logger.debug("Qloo response: %s", qloo_response)
+            return self._profile_from_response(qloo_response)
+
+        except (requests.exceptions.RequestException, GovernorOverloaded) as e:
+            logger.warning("Error calling Qloo API: %s. Returning a mocked taste profile.", e)
+            metrics.ERRORS.inc(component="qloo")
             # Fallback to mocked profile on API error
-            preference_type = user_data.get("preference_type", "balanced")
-            if preference_type == "analytical":
-                return {"style": "analytical", "focus": ["stats", "tactics", "efficiency"]}
-            elif preference_type == "emotional":
-                return {"style": "emotional", "focus": ["passion", "drama", "player_narratives"]}
-            elif preference_type == "humorous":
-                return {"style": "humorous", "focus": ["jokes", "lighthearted", "sarcasm"]}
-            else:
-                return {"style": "balanced", "focus": ["general", "key_moments"]}
+            return self._mock_taste_profile(user_data)
+
+    async def get_user_taste_profile_async(self, user_data: dict) -> dict:
+        """
+        Async variant of get_user_taste_profile for the ASGI server.
+        Uses a shared httpx.AsyncClient so the request doesn't block the event loop.
+        """
+        if not self.api_key:
+            logger.debug("QLOO_API_KEY not set. Returning a mocked taste profile.")
+            return self._mock_taste_profile(user_data)
+
+        import httpx
+
+        if self._async_http is None:
+            self._async_http = httpx.AsyncClient(timeout=QLOO_TIMEOUT_SECONDS, headers=self._headers())
+        try:
+            logger.debug("Fetching taste profile for user: %s", user_data.get('user_id'))
+            async with self.governor.async_slot():
+                with metrics.QLOO_LOOKUP_SECONDS.time():
+                    response = await self._async_http.get(f"{self.base_url}/v2/audiences/types")
+                response.raise_for_status()
+            qloo_response = response.json()
+            logger.debug("Qloo response: %s", qloo_response)
+            return self._profile_from_response(qloo_response)
+        except (httpx.HTTPError, GovernorOverloaded) as e:
+            logger.warning("Error calling Qloo API: %s. Returning a mocked taste profile.", e)
+            metrics.ERRORS.inc(component="qloo")
+            return self._mock_taste_profile(user_data)
 
 
 class OpenAIClient:
@@ -136,100 +235,184 @@ class OpenAIClient:
         self.api_key = os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set.")
+        from openai import OpenAI, AsyncOpenAI # Import OpenAI's official clients
+
         self.client = OpenAI(api_key=self.api_key)
+        self.async_client = AsyncOpenAI(api_key=self.api_key)
+        self.model_name = "gpt-3.5-turbo" # You can try "gpt-4o" for higher quality if desired
+        self.governor = governor_for("openai")
 
-    def generate_commentary(self, prompt: str) -> str:
+    def generate_commentary(self, prompt: str, max_tokens: int = 100) -> str:
         """
         Generates commentary text using an OpenAI LLM.
+        `max_tokens` can be raised for prompts that ask for several commentaries at once.
         """
         try:
-            print("---------------------------------------------------------------")
-            print(f"Generating OpenAI commentary with prompt: {prompt}")
-            chat_completion = self.client.chat.completions.create(
-                model="gpt-3.5-turbo", # You can try "gpt-4o" for higher quality if desired
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=100,
-                temperature=0.7 # Adjust for more/less creativity
-            )
+            logger.debug("Generating OpenAI commentary with prompt: %s", prompt)
+            with self.governor.slot(_llm_tokens(prompt, max_tokens)):
+                chat_completion = self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=max_tokens,
+                    temperature=0.7 # Adjust for more/less creativity
+                )
             return chat_completion.choices[0].message.content.strip()
         except Exception as e:
-            print(f"Error calling OpenAI API: {e}")
-            return "Commentary AI is temporarily unavailable."
+            logger.error("Error calling OpenAI API: %s", e)
+            metrics.ERRORS.inc(component="openai")
+            return OPENAI_ERROR_MESSAGE
 
+    def generate_commentary_stream(self, prompt: str):
+        """
+        Yields commentary text chunks from a streamed OpenAI chat completion.
+        """
+        produced = False
+        try:
+            logger.debug("Streaming OpenAI commentary with prompt: %s", prompt)
+            with self.governor.slot(_llm_tokens(prompt, 100)):
+                stream = self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=100,
+                    temperature=0.7,
+                    stream=True
+                )
+                for chunk in stream:
+                    text = chunk.choices[0].delta.content if chunk.choices else None
+                    if text:
+                        # Match the stripped output of generate_commentary
+                        if not produced:
+                            text = text.lstrip()
+                            if not text:
+                                continue
+                        produced = True
+                        yield text
+        except Exception as e:
+            logger.error("Error streaming from OpenAI API: %s", e)
+            metrics.ERRORS.inc(component="openai")
+            if not produced:
+                yield OPENAI_ERROR_MESSAGE
+            else:
+                raise StreamInterrupted(str(e)) from e
 
-from gtts import gTTS
-import io
-from pydub import AudioSegment # You'll need pydub and ffmpeg for this!
 
 class GTTSClient:
+    # gTTS produces MP3; it is delivered as-is, without transcoding
+    mimetype = "audio/mpeg"
+
     def text_to_speech(self, text: str) -> bytes:
         """
-        Converts text to speech using gTTS and returns WAV bytes.
-        Requires pydub and ffmpeg for MP3 to WAV conversion.
+        Converts text to speech using gTTS and returns MP3 bytes.
         """
-        print("---------------------------------------------------------------")
-        print("Converting text to speech using gTTS...")
-        print("Text:", text)
-        tts = gTTS(text=text, lang='en', slow=False) # 'en' for English
-        mp3_io = io.BytesIO()
-        tts.write_to_fp(mp3_io)
-        mp3_io.seek(0) # Rewind to the beginning
+        return b"".join(self.text_to_speech_stream(text))
 
-        # Convert MP3 (from gTTS) to WAV (for simpleaudio) in memory
-        audio_segment = AudioSegment.from_file(mp3_io, format="mp3")
-        wav_io = io.BytesIO()
-        audio_segment.export(wav_io, format="wav")
-        wav_io.seek(0) # Rewind to the beginning
+    def text_to_speech_stream(self, text: str):
+        """
+        Yields MP3 chunks as gTTS fetches them, so playback can start
+        before the whole clip has been synthesized.
+        """
+        from gtts import gTTS
 
-        return wav_io.getvalue()
+        logger.debug("Converting text to speech using gTTS: %s", text)
+        tts = gTTS(text=text, lang='en', slow=False) # 'en' for English
+        yield from tts.stream()
 
 
 # --- TTS Client (Edge TTS) ---
 DEFAULT_EDGE_VOICE = "en-US-JennyNeural"
+# How many Edge TTS syntheses may run at the same time
+DEFAULT_EDGE_MAX_PARALLEL = 4
 
 
 class EdgeTTSClient:
-    def __init__(self, voice: str = DEFAULT_EDGE_VOICE):
+    """
+    Text-to-speech via edge-tts.
+    All syntheses run on one long-lived event loop in a background thread and
+    collect audio in memory, so concurrent calls never share a file and don't
+    pay for event loop setup. At most `max_parallel` run at once.
+    Returns MP3 bytes (edge-tts' default output format).
+    """
+    mimetype = "audio/mpeg"
+
+    def __init__(self, voice: str = DEFAULT_EDGE_VOICE, max_parallel: int = DEFAULT_EDGE_MAX_PARALLEL):
+        import edge_tts
+
+        self._edge_tts = edge_tts
         self.voice = voice
-        self.i = 0
+        self.max_parallel = max_parallel
+        self._loop = None
+        self._semaphore = None
+        self._loop_lock = threading.Lock()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Starts the shared synthesis loop on first use."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="edge-tts", daemon=True).start()
+            return self._loop
+
+    async def _synthesize(self, text: str, on_chunk):
+        """Runs one synthesis on the shared loop, passing each audio chunk to `on_chunk`."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_parallel)
+        async with self._semaphore:
+            communicate = self._edge_tts.Communicate(text, self.voice)
+            async for chunk in communicate.stream():
+                if chunk["type"] == "audio":
+                    on_chunk(chunk["data"])
 
     async def _text_to_speech_async(self, text: str) -> bytes:
-        """Internal async method to generate speech."""
+        """Internal async method to generate speech. Collects the audio in memory."""
+        audio_chunks = []
         try:
-            filename = "output.wav"
-            communicate = edge_tts.Communicate(text, self.voice)
-            await communicate.save(filename)
-            with open(filename, "rb") as f:
-                wav_data = f.read()
-            os.remove(filename)  # Clean up the file
-            return wav_data
+            await self._synthesize(text, audio_chunks.append)
         except Exception as e:
-            print(f"Error in Edge TTS async generation: {e}")
+            logger.error("Error in Edge TTS async generation: %s", e)
+            metrics.ERRORS.inc(component="edge_tts")
             return b""
+        return b"".join(audio_chunks)
 
-    def text_to_speech(self, text: str) -> bytes:
+    def text_to_speech_stream(self, text: str):
         """
-        Converts text to speech using edge-tts and returns WAV bytes.
-        Runs the async method in an event loop.
+        Yields MP3 chunks as edge-tts produces them, without waiting for the whole clip.
+        Raises if the synthesis fails part-way, so a truncated clip is never mistaken for a complete one.
         """
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            wav_data = loop.run_until_complete(self._text_to_speech_async(text))
-            return wav_data
-        finally:
-            loop.close()
-            asyncio.set_event_loop(None)
+        audio_chunks = queue.Queue()
+
+        async def produce():
+            try:
+                await self._synthesize(text, audio_chunks.put)
+                audio_chunks.put(None)
+            except Exception as e:
+                audio_chunks.put(e)
+
+        asyncio.run_coroutine_threadsafe(produce(), self._get_loop())
+        while True:
+            chunk = audio_chunks.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+    def _submit(self, text: str):
+        return asyncio.run_coroutine_threadsafe(self._text_to_speech_async(text), self._get_loop())
 
+    def text_to_speech(self, text: str) -> bytes:
+        """
+        Converts text to speech using edge-tts and returns the audio bytes.
+        Blocks until the synthesis on the shared loop completes.
+        """
+        return self._submit(text).result()
 
-# If you use gTTS, you'll need pydub again, and thus ffmpeg.
-# So, the "no ffmpeg" benefit from the ElevenLabs WAV trick is lost here.
-# You would replace elevenlabs_client with gtts_client.
 
 class ElevenLabsClient:
     """
     Client for interacting with the ElevenLabs API (Text-to-Speech).
     """
+    mimetype = "audio/mpeg"
+
     def __init__(self):
         self.api_key = os.getenv("ELEVENLABS_API_KEY")
         if not self.api_key:
@@ -237,12 +420,11 @@ class ElevenLabsClient:
         self.base_url = "https://api.elevenlabs.io/v1"
         # Default voice ID (e.g., 'Rachel'). Find more in your ElevenLabs dashboard.
         self.default_voice_id = "21m00Tzpb8IMy8lnFpwa"
+        # ElevenLabs quotas are in characters, so ELEVENLABS_TPM is read as characters per minute
+        self.governor = governor_for("elevenlabs")
 
-    def text_to_speech(self, text: str, voice_id: str = None) -> bytes:
-        """
-        Converts text to speech audio data using ElevenLabs.
-        Returns raw audio bytes.
-        """
+    def _request(self, text: str, voice_id: str = None):
+        """Builds the (url, headers, payload) for a text-to-speech request."""
         headers = {
             "xi-api-key": self.api_key,
             "Content-Type": "application/json",
@@ -258,15 +440,33 @@ class ElevenLabsClient:
         }
         selected_voice_id = voice_id if voice_id else self.default_voice_id
         url = f"{self.base_url}/text-to-speech/{selected_voice_id}"
+        return url, headers, payload
 
+    def text_to_speech(self, text: str, voice_id: str = None) -> bytes:
+        """
+        Converts text to speech audio data using ElevenLabs.
+        Returns raw audio bytes.
+        """
+        url, headers, payload = self._request(text, voice_id)
         try:
-            response = requests.post(url, json=payload, headers=headers, stream=True)
+            with self.governor.slot(len(text)):
+                response = requests.post(url, json=payload, headers=headers, stream=True)
+                response.raise_for_status()
+                # Read the audio content in chunks; joining once avoids quadratic concatenation
+                return b"".join(response.iter_content(chunk_size=4096))
+        except (requests.exceptions.RequestException, GovernorOverloaded) as e:
+            logger.error("Error calling ElevenLabs API: %s", e)
+            metrics.ERRORS.inc(component="elevenlabs")
+            return None
+
+    def text_to_speech_stream(self, text: str, voice_id: str = None):
+        """
+        Yields MP3 chunks as ElevenLabs sends them, without buffering the whole clip.
+        Request errors are raised to the caller rather than ending the stream silently.
+        """
+        url, headers, payload = self._request(text, voice_id)
+        with self.governor.slot(len(text)), requests.post(url, json=payload, headers=headers, stream=True) as response:
             response.raise_for_status()
-            # Read the audio content in chunks
-            audio_content = b''
-            for chunk in response.iter_content(chunk_size=1024):
-                audio_content += chunk
-            return audio_content
-        except requests.exceptions.RequestException as e:
-            print(f"Error calling ElevenLabs API: {e}")
-            return None
\ No newline at end of file
+            for chunk in response.iter_content(chunk_size=4096):
+                if chunk:
+                    yield chunk
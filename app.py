@@ -1,24 +1,52 @@
 # app.py
 
+import logging
+import os
 import time
-import json
-from flask import Flask, render_template, request, jsonify
-import io
-import wave
-import simpleaudio as sa # For playing audio directly
-# from pydub import AudioSegment # For converting raw audio to WAV format for simpleaudio
-
-from api_clients import QlooClient, OpenAIClient, ElevenLabsClient, GTTSClient, GeminiClient, EdgeTTSClient
+from flask import Flask, render_template, request, jsonify, session
+import uuid
+
 from commentary_generator import CommentaryGenerator
+from providers import create_llm_client, create_qloo_client, create_tts_client
+from event_sources import ListEventSource, JSONLEventSource, StdinEventSource, TCPEventSource, is_valid_match_id
+from commentary_cache import CommentaryCache
+from audio_cache import AudioCache, CachedTTSClient
+from profile_cache import TasteProfileCache
+from replay_bundle import BundleStore
+from broadcaster import BroadcastHub
+from serving import StreamRequestError, commentary_audio, open_commentary_stream, sse_error_frame
+import metrics
+
+# LOG_LEVEL=DEBUG also logs every prompt and generated commentary line
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+# Signs the session cookie that holds each user's taste profile.
+# Set FLASK_SECRET_KEY so sessions survive restarts and work across worker processes.
+app.secret_key = os.getenv("FLASK_SECRET_KEY") or os.urandom(24)
 
 # Initialize API Clients
-qloo_client = QlooClient()
-openai_client = GeminiClient()
-# elevenlabs_client = ElevenLabsClient()
-gtts_client = EdgeTTSClient() # If you want to use gTTS instead of ElevenLabs
-commentary_generator = CommentaryGenerator(openai_client)
+# Backends come from LLM_PROVIDER / LLM_FALLBACK_PROVIDER / TTS_PROVIDER (see providers.py);
+# each client, and its SDK, is only loaded when it is first used.
+qloo_client = create_qloo_client()
+openai_client = create_llm_client()
+# Repeated lines are served from the audio cache instead of being synthesized again.
+# Set TTS_CACHE_DIR to keep a file-backed cold tier across restarts.
+audio_cache = AudioCache(cache_dir=os.getenv("TTS_CACHE_DIR"))
+tts_client = create_tts_client()
+gtts_client = CachedTTSClient(tts_client, audio_cache, provider=tts_client.name)
+# Identical prompts (replays, repeated events) are answered from the cache.
+# Set COMMENTARY_CACHE_DB to a file path to keep the cache across restarts.
+commentary_cache = CommentaryCache(db_path=os.getenv("COMMENTARY_CACHE_DB"))
+commentary_generator = CommentaryGenerator(openai_client, cache=commentary_cache)
+# One broadcaster per running match, shared by every viewer of that match.
+# GENERATION_WORKERS sizes the LLM pool all matches share (see lookahead.py for the throughput it allows);
+# LIVE_GENERATION_WORKERS sizes the separate pool for lines viewers are already waiting on.
+broadcast_hub = BroadcastHub(commentary_generator)
 
 # --- Simulated Game Events (for PoC) ---
 # Each event has a 'time' (in seconds from start) and details for commentary.
@@ -36,8 +64,36 @@ GAME_EVENTS = [
     {"time": 120, "sport": "Football", "event_type": "end_game", "score": "2-1", "winning_team": "Al Nassr"},
 ]
 
-# --- Global variable to store selected user taste profile ---
-current_user_taste = {}
+# --- Event sources ---
+# "demo" replays GAME_EVENTS. Other match ids are streamed lazily from MATCH_DIR/<match>.jsonl.
+# "live" reads a JSON-lines feed from LIVE_FEED_ADDRESS (host:port), or from stdin if it isn't set.
+MATCH_DIR = os.getenv("MATCH_DIR", "matches")
+LIVE_FEED_ADDRESS = os.getenv("LIVE_FEED_ADDRESS")
+
+def open_event_source(match_id: str):
+    """Returns the EventSource for a match id, or None if there is no such match."""
+    if match_id == "demo":
+        return ListEventSource(GAME_EVENTS)
+    if match_id == "live":
+        if LIVE_FEED_ADDRESS:
+            host, port = LIVE_FEED_ADDRESS.rsplit(":", 1)
+            return TCPEventSource(host, int(port))
+        return StdinEventSource()
+    if not is_valid_match_id(match_id):
+        return None
+    path = os.path.join(MATCH_DIR, f"{match_id}.jsonl")
+    return JSONLEventSource(path) if os.path.isfile(path) else None
+
+# --- Baked replays ---
+# Matches baked with bake.py are replayed from BUNDLE_DIR/<match>.bundle without
+# any LLM or TTS calls (styles missing from the bundle are still generated live).
+BUNDLE_DIR = os.getenv("BUNDLE_DIR", "bundles")
+bundle_store = BundleStore(BUNDLE_DIR)
+
+# --- Taste profiles ---
+# Each browser session stores its own selected profile (in the signed session cookie).
+# Qloo lookups are cached per (user, preference) and refreshed in the background once stale.
+profile_cache = TasteProfileCache(lambda user_data: qloo_client.get_user_taste_profile(user_data))
 
 @app.route('/')
 def index():
@@ -50,62 +106,79 @@ def select_profile():
     Handles the selection of a commentary profile.
     Simulates sending user data to Qloo to get a taste profile.
     """
-    global current_user_taste
     selected_profile_type = request.form['profile']
 
     # Simulate user data that Qloo might process.
     # In a real app, this would come from user's actual behavior/preferences.
-    user_data_for_qloo = {"user_id": "demo_user_123", "preference_type": selected_profile_type}
+    user_id = session.setdefault("user_id", uuid.uuid4().hex)
+    user_data_for_qloo = {"user_id": user_id, "preference_type": selected_profile_type}
 
-    # Get taste profile from Qloo (or its mock/fallback)
-    current_user_taste = qloo_client.get_user_taste_profile(user_data_for_qloo)
+    # Get taste profile from the cache, or from Qloo (or its mock/fallback) on a miss
+    user_taste = profile_cache.get(user_data_for_qloo)
+    session["taste_profile"] = user_taste
 
     return jsonify({
         "message": f"Profile set to {selected_profile_type}",
-        "profile_style": current_user_taste.get("style", "balanced")
+        "profile_style": user_taste.get("style", "balanced")
     })
 
 
-from flask import Response
+from flask import Response, stream_with_context
+
+def sse_error_response(message: str):
+    return Response([sse_error_frame(message)], mimetype='text/event-stream')
 
 @app.route('/start_game', methods=['GET'])
 def start_game():
     """
     Streams commentary events as Server-Sent Events (SSE) so the UI receives each commentary as soon as it's generated.
     """
-    if not current_user_taste:
-        # SSE expects a stream, so send an error event
-        def error_stream():
-            yield f"event: error\ndata: {json.dumps({'error': 'Please select a commentary profile first.'})}\n\n"
-        return Response(error_stream(), mimetype='text/event-stream')
+    try:
+        broadcaster, subscriber = open_commentary_stream(
+            broadcast_hub, bundle_store, open_event_source, session.get("taste_profile"),
+            request.args.get('match', 'demo'), request.headers.get('Last-Event-ID'), request.args.get('speed')
+        )
+    except StreamRequestError as e:
+        return sse_error_response(str(e))
 
     def event_stream():
-        start_time_sim = time.time()
-        for event in GAME_EVENTS:
-            elapsed_time_sim = time.time() - start_time_sim
-            time_to_wait = event["time"] - elapsed_time_sim
-            if time_to_wait > 0:
-                time.sleep(time_to_wait)
-
-            print(f"\n--- Simulating Event at {event['time']}s ---")
-            print(f"Event: {event.get('event_type', 'N/A')} by {event.get('player', 'N/A')}")
-            print(f"User Taste Style: {current_user_taste.get('style', 'N/A')}")
-
-            commentary_text = commentary_generator.get_commentary(event, current_user_taste)
-            print(f"Generated Commentary: {commentary_text}")
-
-            data = {
-                "time": event["time"],
-                "event_type": event["event_type"],
-                "commentary": commentary_text,
-                "profile_style": current_user_taste.get('style', 'N/A')
-            }
-            yield f"data: {json.dumps(data)}\n\n"
-        # Optionally, send a final event to indicate end
-        yield "event: end\ndata: {\"message\": \"Game ended\"}\n\n"
+        metrics.OPEN_STREAMS.inc()
+        try:
+            for frame in subscriber.frames():
+                started = time.perf_counter()
+                # Resumes once the server has written the frame to the client
+                yield frame
+                metrics.SSE_WRITE_SECONDS.observe(time.perf_counter() - started)
+                metrics.SSE_FRAMES.inc()
+        finally:
+            # Runs when the match ends or the client disconnects
+            metrics.OPEN_STREAMS.dec()
+            broadcaster.unsubscribe(subscriber)
 
     return Response(event_stream(), mimetype='text/event-stream')
 
+@app.route('/audio/<match_id>/<int:event_index>', methods=['GET'])
+def event_audio(match_id, event_index):
+    """
+    Streams the spoken version of one commentary line.
+    Provider chunks are forwarded as they arrive (chunked transfer) in the
+    provider's native format, without transcoding or buffering the whole clip.
+    """
+    clip = commentary_audio(broadcast_hub, bundle_store, gtts_client, match_id, event_index,
+                            request.args.get('style', 'balanced'))
+    if clip is None:
+        return jsonify({"error": "No commentary for this event yet."}), 404
+    if clip.length is not None:
+        response = Response(clip.chunks, mimetype=clip.mimetype)
+        response.headers["Content-Length"] = str(clip.length)
+        return response
+    return Response(stream_with_context(clip.chunks), mimetype=clip.mimetype)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Exposes per-stage timings, cache and error counters and stream gauges for Prometheus."""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
 if __name__ == '__main__':
     # Ensure you have your virtual environment activated before running
     # python app.py
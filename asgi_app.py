@@ -0,0 +1,129 @@
+# asgi_app.py
+#
+# Asyncio serving mode for the same routes as app.py.
+# Each open commentary stream is a coroutine waiting on its subscriber queue
+# instead of a blocked worker thread, so one process can hold thousands of
+# streams. Commentary generation still happens once per match on the shared
+# broadcaster worker pool.
+#
+# Run with an ASGI server, e.g.:
+#   hypercorn asgi_app:app
+#   uvicorn asgi_app:app
+
+import asyncio
+import logging
+import time
+import uuid
+from quart import Quart, render_template, request, jsonify, Response, session
+
+from app import app as flask_app, open_event_source, broadcast_hub, bundle_store, qloo_client, gtts_client, profile_cache
+import metrics
+from serving import StreamRequestError, commentary_audio, open_commentary_stream, sse_error_frame
+
+logger = logging.getLogger(__name__)
+
+app = Quart(__name__)
+
+# Same session cookie signing key as the Flask app
+app.secret_key = flask_app.secret_key
+
+@app.route('/')
+async def index():
+    """Renders the main HTML page for the application."""
+    return await render_template('index.html')
+
+@app.route('/select_profile', methods=['POST'])
+async def select_profile():
+    """
+    Handles the selection of a commentary profile.
+    Same contract as app.select_profile, with a non-blocking Qloo lookup.
+    """
+    form = await request.form
+    selected_profile_type = form['profile']
+
+    user_id = session.setdefault("user_id", uuid.uuid4().hex)
+    user_data_for_qloo = {"user_id": user_id, "preference_type": selected_profile_type}
+    user_taste = profile_cache.get_cached(user_data_for_qloo)
+    if user_taste is None:
+        user_taste = await qloo_client.get_user_taste_profile_async(user_data_for_qloo)
+        profile_cache.put(user_data_for_qloo, user_taste)
+    session["taste_profile"] = user_taste
+
+    return jsonify({
+        "message": f"Profile set to {selected_profile_type}",
+        "profile_style": user_taste.get("style", "balanced")
+    })
+
+def sse_error_response(message: str):
+    async def error_stream():
+        yield sse_error_frame(message)
+    return Response(error_stream(), mimetype='text/event-stream')
+
+@app.route('/start_game', methods=['GET'])
+async def start_game():
+    """
+    Streams commentary events as Server-Sent Events (SSE), like app.start_game.
+    """
+    try:
+        broadcaster, subscriber = open_commentary_stream(
+            broadcast_hub, bundle_store, open_event_source, session.get("taste_profile"),
+            request.args.get('match', 'demo'), request.headers.get('Last-Event-ID'), request.args.get('speed'),
+            loop=asyncio.get_running_loop()
+        )
+    except StreamRequestError as e:
+        return sse_error_response(str(e))
+
+    async def event_stream():
+        metrics.OPEN_STREAMS.inc()
+        try:
+            async for frame in subscriber.frames_async():
+                started = time.perf_counter()
+                yield frame
+                metrics.SSE_WRITE_SECONDS.observe(time.perf_counter() - started)
+                metrics.SSE_FRAMES.inc()
+        finally:
+            # Runs when the match ends or the client disconnects
+            metrics.OPEN_STREAMS.dec()
+            broadcaster.unsubscribe(subscriber)
+
+    response = Response(event_stream(), mimetype='text/event-stream')
+    # Matches run for minutes; don't let Quart's default response timeout cut the stream
+    response.timeout = None
+    return response
+
+async def _iterate_in_thread(iterator):
+    """Drives a blocking iterator from a worker thread, one item at a time."""
+    iterator = iter(iterator)
+    while True:
+        item = await asyncio.to_thread(next, iterator, None)
+        if item is None:
+            return
+        yield item
+
+@app.route('/audio/<match_id>/<int:event_index>', methods=['GET'])
+async def event_audio(match_id, event_index):
+    """
+    Streams the spoken version of one commentary line, like app.event_audio.
+    """
+    clip = commentary_audio(broadcast_hub, bundle_store, gtts_client, match_id, event_index,
+                            request.args.get('style', 'balanced'))
+    if clip is None:
+        return jsonify({"error": "No commentary for this event yet."}), 404
+    if clip.length is not None:
+        # Baked clips are sliced from memory, so they don't need a worker thread
+        async def bundle_stream():
+            for chunk in clip.chunks:
+                yield chunk
+
+        response = Response(bundle_stream(), mimetype=clip.mimetype)
+        response.headers["Content-Length"] = str(clip.length)
+        return response
+
+    response = Response(_iterate_in_thread(clip.chunks), mimetype=clip.mimetype)
+    response.timeout = None
+    return response
+
+@app.route('/metrics', methods=['GET'])
+async def metrics_endpoint():
+    """Same Prometheus text output as app.metrics_endpoint."""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
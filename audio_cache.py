@@ -0,0 +1,317 @@
+# audio_cache.py
+
+from collections import OrderedDict
+import hashlib
+import logging
+import mmap
+import os
+import threading
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOT_BYTES = 32 * 1024 * 1024
+DEFAULT_COLD_BYTES = 512 * 1024 * 1024
+# Chunk size used when streaming a cached clip to a client
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
+class AudioCache:
+    """
+    Byte-budgeted cache for synthesized speech, keyed by (text, voice, provider).
+    The hot tier is an in-memory LRU bounded by `hot_bytes`. If `cache_dir` is
+    set, every clip is also written to a cold tier of one file per clip, bounded
+    by `cold_bytes`, which survives restarts and is memory-mapped when served.
+    """
+    def __init__(self, hot_bytes: int = DEFAULT_HOT_BYTES, cache_dir: str = None,
+                 cold_bytes: int = DEFAULT_COLD_BYTES):
+        self.hot_bytes = hot_bytes
+        self.cold_bytes = cold_bytes
+        self.cache_dir = cache_dir
+        self._hot = OrderedDict()  # key -> bytes
+        self._hot_size = 0
+        self._cold = OrderedDict()  # key -> size on disk, least recently used first
+        self._cold_size = 0
+        self._lock = threading.Lock()
+        self.hot_hits = 0
+        self.cold_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Rebuild the cold index from disk, oldest files first
+            entries = []
+            for name in os.listdir(cache_dir):
+                if name.endswith(".audio"):
+                    stat = os.stat(os.path.join(cache_dir, name))
+                    entries.append((stat.st_mtime, name[:-len(".audio")], stat.st_size))
+            for _, key, size in sorted(entries):
+                self._cold[key] = size
+                self._cold_size += size
+
+    @staticmethod
+    def make_key(text: str, voice: str, provider: str) -> str:
+        digest = hashlib.sha256()
+        for part in (provider, voice, text):
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.audio")
+
+    def get(self, key: str):
+        """
+        Returns the cached audio, or None on a miss.
+        Hot hits return bytes; cold hits return a read-only mmap of the file,
+        which supports len(), slicing and the buffer protocol.
+        """
+        with self._lock:
+            audio = self._hot.get(key)
+            if audio is not None:
+                self._hot.move_to_end(key)
+                self.hot_hits += 1
+                metrics.CACHE_LOOKUPS.inc(cache="audio", result="hit")
+                return audio
+
+            if key in self._cold:
+                try:
+                    with open(self._path(key), "rb") as f:
+                        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    # File vanished or is empty; forget it
+                    self._cold_size -= self._cold.pop(key)
+                else:
+                    self._cold.move_to_end(key)
+                    self.cold_hits += 1
+                    metrics.CACHE_LOOKUPS.inc(cache="audio", result="disk_hit")
+                    return mapped
+
+            self.misses += 1
+            metrics.CACHE_LOOKUPS.inc(cache="audio", result="miss")
+            return None
+
+    def put(self, key: str, audio: bytes):
+        if not audio:
+            return
+        with self._lock:
+            self._put_hot(key, bytes(audio))
+            if self.cache_dir:
+                self._put_cold(key, audio)
+
+    def _put_hot(self, key: str, audio: bytes):
+        if len(audio) > self.hot_bytes:
+            return
+        if key in self._hot:
+            self._hot_size -= len(self._hot.pop(key))
+        self._hot[key] = audio
+        self._hot_size += len(audio)
+        while self._hot_size > self.hot_bytes:
+            _, evicted = self._hot.popitem(last=False)
+            self._hot_size -= len(evicted)
+            self.evictions += 1
+
+    def _put_cold(self, key: str, audio: bytes):
+        if key in self._cold or len(audio) > self.cold_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error("Error writing audio cache file: %s", e)
+            metrics.ERRORS.inc(component="audio_cache")
+            return
+        self._cold[key] = len(audio)
+        self._cold_size += len(audio)
+        while self._cold_size > self.cold_bytes:
+            evicted_key, size = self._cold.popitem(last=False)
+            self._cold_size -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(evicted_key))
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hot_hits + self.cold_hits + self.misses
+            return {
+                "hot_entries": len(self._hot),
+                "hot_bytes": self._hot_size,
+                "cold_entries": len(self._cold),
+                "cold_bytes": self._cold_size,
+                "hot_hits": self.hot_hits,
+                "cold_hits": self.cold_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hot_hits + self.cold_hits) / lookups if lookups else 0.0,
+            }
+
+
+class _SharedSynthesis:
+    """
+    One provider synthesis teed to every request for the same line. Chunks are
+    buffered as they arrive; whichever reader has caught up pulls the next chunk
+    from the provider, so no reader depends on another staying connected. The
+    provider stream is closed if every reader leaves before it finishes.
+    `on_complete(audio)` runs once the clip is whole; `on_failed()` runs if it never will be.
+    """
+    def __init__(self, chunks, on_complete, on_failed):
+        self._source = iter(chunks)
+        self._on_complete = on_complete
+        self._on_failed = on_failed
+        self._chunks = []
+        self._done = False
+        self._error = None
+        self._pulling = False
+        self._readers = 0
+        self._started = time.perf_counter()
+        self._condition = threading.Condition()
+
+    def __iter__(self):
+        with self._condition:
+            self._readers += 1
+        position = 0
+        try:
+            while True:
+                with self._condition:
+                    while position >= len(self._chunks) and not self._done and self._pulling:
+                        self._condition.wait()
+                    if position < len(self._chunks):
+                        chunk = self._chunks[position]
+                    elif self._done:
+                        if self._error is not None:
+                            raise self._error
+                        return
+                    else:
+                        self._pulling = True
+                        chunk = None
+                if chunk is not None:
+                    position += 1
+                    yield chunk
+                    continue
+                self._pull()
+        finally:
+            with self._condition:
+                self._readers -= 1
+                abandoned = self._readers == 0 and not self._done
+                if abandoned:
+                    self._done = True
+                    self._error = RuntimeError("Synthesis abandoned by every reader")
+            if abandoned:
+                if hasattr(self._source, "close"):
+                    self._source.close()
+                self._on_failed()
+
+    def _pull(self):
+        """Fetches one chunk from the provider; only one reader pulls at a time."""
+        try:
+            chunk = next(self._source)
+        except StopIteration:
+            metrics.TTS_SYNTHESIS_SECONDS.observe(time.perf_counter() - self._started)
+            self._on_complete(b"".join(self._chunks))
+            self._finish()
+            return
+        except Exception as e:
+            self._on_failed()
+            self._finish(e)
+            return
+        with self._condition:
+            if chunk:
+                self._chunks.append(chunk)
+            self._pulling = False
+            self._condition.notify_all()
+
+    def _finish(self, error: Exception = None):
+        with self._condition:
+            self._done = True
+            self._error = error
+            self._pulling = False
+            self._condition.notify_all()
+
+
+class CachedTTSClient:
+    """
+    Wraps any TTS client (EdgeTTSClient, GTTSClient, ElevenLabsClient) so lines
+    that were voiced before are served from the AudioCache instead of being
+    synthesized again. Concurrent requests for a line that is still being
+    synthesized share that one synthesis rather than starting their own.
+    """
+    def __init__(self, tts_client, cache: AudioCache, provider: str = None):
+        self.tts_client = tts_client
+        self.cache = cache
+        self.provider = provider or type(tts_client).__name__
+        self._in_flight = {}  # key -> _SharedSynthesis
+        self._in_flight_lock = threading.Lock()
+
+    @property
+    def voice(self) -> str:
+        # Read on use rather than in __init__, so a lazily built client isn't constructed early
+        return getattr(self.tts_client, "voice", None) or getattr(self.tts_client, "default_voice_id", "default")
+
+    @property
+    def mimetype(self) -> str:
+        return getattr(self.tts_client, "mimetype", "application/octet-stream")
+
+    def _key(self, text: str, voice_id: str = None) -> str:
+        return self.cache.make_key(text, voice_id or self.voice, self.provider)
+
+    def _audio(self, text: str, voice_id: str = None):
+        """Returns the cached clip, or the shared synthesis to read it from (starting one if needed)."""
+        key = self._key(text, voice_id)
+        with self._in_flight_lock:
+            synthesis = self._in_flight.get(key)
+        if synthesis is not None:
+            metrics.CACHE_LOOKUPS.inc(cache="audio", result="in_flight")
+            return synthesis
+        audio = self.cache.get(key)
+        if audio is not None:
+            return audio
+
+        with self._in_flight_lock:
+            synthesis = self._in_flight.get(key)
+            if synthesis is None:
+                if voice_id:
+                    chunks = self.tts_client.text_to_speech_stream(text, voice_id=voice_id)
+                else:
+                    chunks = self.tts_client.text_to_speech_stream(text)
+
+                def complete(audio: bytes):
+                    # Cache before dropping the in-flight entry, so later requests find one or the other
+                    self.cache.put(key, audio)
+                    self._forget(key, synthesis)
+
+                synthesis = _SharedSynthesis(chunks, complete, lambda: self._forget(key, synthesis))
+                self._in_flight[key] = synthesis
+        return synthesis
+
+    def _forget(self, key: str, synthesis: _SharedSynthesis):
+        with self._in_flight_lock:
+            if self._in_flight.get(key) is synthesis:
+                del self._in_flight[key]
+
+    def text_to_speech(self, text: str, voice_id: str = None) -> bytes:
+        """Returns the whole clip. Raises if the provider fails part-way."""
+        audio = self._audio(text, voice_id)
+        if isinstance(audio, _SharedSynthesis):
+            return b"".join(audio)
+        return bytes(audio)
+
+    def text_to_speech_stream(self, text: str, voice_id: str = None):
+        """
+        Yields audio chunks. Cached clips are sliced straight from the cache;
+        misses are streamed from the (shared) provider synthesis as chunks arrive
+        and cached once complete.
+        """
+        audio = self._audio(text, voice_id)
+        if isinstance(audio, _SharedSynthesis):
+            yield from audio
+            return
+        for offset in range(0, len(audio), STREAM_CHUNK_SIZE):
+            yield audio[offset:offset + STREAM_CHUNK_SIZE]
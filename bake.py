@@ -0,0 +1,114 @@
+# bake.py
+#
+# Precomputes a match's commentary and audio for a set of taste styles and
+# writes them to a replay bundle, which the server then replays without any
+# LLM or TTS calls.
+#
+# Example:
+#   python bake.py demo --styles analytical,emotional,humorous,balanced
+#   python bake.py final --events matches/final.jsonl --output bundles/final.bundle
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+import os
+import time
+
+import app as sportsync
+from api_clients import LLM_FALLBACK_RESPONSES, style_profile
+from commentary_templates import render_commentary
+from event_sources import JSONLEventSource
+from outbound_governor import PRIORITY_BAKE, run_with_priority
+from replay_bundle import write_bundle
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STYLES = ["analytical", "emotional", "humorous", "balanced"]
+DEFAULT_BAKE_WORKERS = 8
+
+
+def bake_match(match_id: str, events: list, styles: list, output: str, workers: int = DEFAULT_BAKE_WORKERS) -> dict:
+    """
+    Generates every (event, style) line with one batched LLM call per event and
+    voices each line as soon as its event's text is ready. Voicing has a pool of
+    its own, so it doesn't queue behind the text of later events.
+    Lines the LLM couldn't produce are baked from the commentary templates.
+    Calls run at bake priority, so a server sharing the process keeps serving live viewers first.
+    Returns a summary dict.
+    """
+    profiles = {style: style_profile(style) for style in styles}
+    started = time.time()
+    texts, audio_futures, fallbacks = {}, {}, 0
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bake-text") as text_pool, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bake-audio") as audio_pool:
+        text_futures = {
+            text_pool.submit(run_with_priority, PRIORITY_BAKE, sportsync.commentary_generator.get_commentary_batch,
+                             event, profiles): index
+            for index, event in enumerate(events)
+        }
+        for future in as_completed(text_futures):
+            index = text_futures[future]
+            for style, commentary_text in future.result().items():
+                if commentary_text in LLM_FALLBACK_RESPONSES:
+                    commentary_text = render_commentary(events[index], style)
+                    fallbacks += 1
+                texts[(index, style)] = commentary_text
+                audio_futures[(index, style)] = audio_pool.submit(
+                    run_with_priority, PRIORITY_BAKE, sportsync.gtts_client.text_to_speech, commentary_text
+                )
+
+        entries = {}
+        missing_audio = 0
+        for key, audio_future in audio_futures.items():
+            try:
+                audio = audio_future.result()
+            except Exception as e:
+                logger.error("Error voicing event %d (%s): %s", key[0], key[1], e)
+                audio = None
+            if not audio:
+                missing_audio += 1
+            entries[key] = (texts[key], audio)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    write_bundle(output, match_id, events, entries, sportsync.gtts_client.mimetype)
+    return {
+        "match_id": match_id,
+        "events": len(events),
+        "styles": styles,
+        "lines": len(entries),
+        "template_fallbacks": fallbacks,
+        "missing_audio": missing_audio,
+        "bytes": os.path.getsize(output),
+        "seconds": time.time() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bake a match's commentary and audio into a replay bundle.")
+    parser.add_argument("match", help="match id; also names the bundle the server replays for ?match=<id>")
+    parser.add_argument("--events", help="JSONL event file (default: the server's event source for the match)")
+    parser.add_argument("--styles", default=",".join(DEFAULT_STYLES), help="comma-separated taste styles to bake")
+    parser.add_argument("--output", help="bundle path (default: BUNDLE_DIR/<match>.bundle)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_BAKE_WORKERS, help="parallel LLM calls, and parallel TTS calls")
+    args = parser.parse_args()
+
+    source = JSONLEventSource(args.events) if args.events else sportsync.open_event_source(args.match)
+    if source is None:
+        parser.error(f"Unknown match: {args.match}")
+    if source.live:
+        parser.error("Live matches can't be baked; pass --events with a recorded JSONL file.")
+    events = list(source)
+    styles = [style.strip() for style in args.styles.split(",") if style.strip()]
+    output = args.output or sportsync.bundle_store.path(args.match)
+
+    summary = bake_match(args.match, events, styles, output, args.workers)
+    print(f"Baked {summary['lines']} lines for {summary['events']} events into {output} "
+          f"({summary['bytes']} bytes) in {summary['seconds']:.1f}s")
+    if summary["template_fallbacks"] or summary["missing_audio"]:
+        print(f"{summary['template_fallbacks']} lines fell back to templates, "
+              f"{summary['missing_audio']} lines have no audio and will be voiced live")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+# benchmark.py
+#
+# Offline load benchmark for the Flask app. Gemini, Qloo and Edge TTS are
+# replaced with deterministic stand-ins whose latency is configurable, then N
+# simulated viewers call /select_profile and /start_game concurrently over
+# accelerated synthetic matches. Results are printed and saved as JSON so runs
+# can be compared between versions.
+#
+# Example:
+#   python benchmark.py --clients 200 --events 30 --speed 20 --llm-latency 0.8 --output bench.json
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import app as sportsync
+from api_clients import NO_COMMENTARY_MESSAGE, style_profile
+from audio_cache import AudioCache, CachedTTSClient
+from broadcaster import BroadcastHub
+from commentary_cache import CommentaryCache
+from commentary_generator import CommentaryGenerator
+
+STYLES = ["balanced", "analytical", "emotional", "humorous"]
+SYNTHETIC_EVENT_TYPES = [
+    "possession_change", "shot_on_goal", "foul", "corner", "save", "possession_change", "substitution", "penalty",
+]
+
+
+class StubLLMClient:
+    """
+    Stand-in for GeminiClient/OpenAIClient. Answers after `latency` seconds
+    (plus up to `jitter`, drawn from a seeded generator) with text derived from
+    the prompt, so identical prompts always get identical commentary.
+    Batch prompts get a JSON object with one line per requested style.
+    """
+    model_name = "stub-llm"
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.0, token_delay: float = 0.01,
+                 failure_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.token_delay = token_delay
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _wait(self) -> bool:
+        """Sleeps for one call's latency. Returns False if this call should fail."""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.failure_rate
+        time.sleep(delay)
+        return not failed
+
+    def _text(self, prompt: str, style: str = "") -> str:
+        digest = hashlib.sha256(f"{style}\n{prompt}".encode("utf-8")).hexdigest()[:8]
+        return f"Stub commentary {digest} in a {style or 'single'} style, describing the event as it happens."
+
+    def generate_commentary(self, prompt: str, max_tokens: int = None) -> str:
+        if not self._wait():
+            return NO_COMMENTARY_MESSAGE
+        styles = re.findall(r'^- "([^"]+)":', prompt, flags=re.MULTILINE)
+        if styles:
+            return json.dumps({style: self._text(prompt, style) for style in styles})
+        return self._text(prompt)
+
+    def generate_commentary_stream(self, prompt: str):
+        if not self._wait():
+            yield NO_COMMENTARY_MESSAGE
+            return
+        words = self._text(prompt).split(" ")
+        for position, word in enumerate(words):
+            if position:
+                time.sleep(self.token_delay)
+            yield word if position == 0 else " " + word
+
+
+class StubTTSClient:
+    """Stand-in for EdgeTTSClient: fixed-size fake audio, delivered in chunks after `latency` seconds."""
+    mimetype = "audio/mpeg"
+
+    def __init__(self, latency: float = 0.2, chunk_delay: float = 0.01, chunks: int = 8, chunk_size: int = 4096):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.chunks = chunks
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def text_to_speech_stream(self, text: str):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        seed = hashlib.sha256(text.encode("utf-8")).digest()
+        for _ in range(self.chunks):
+            yield (seed * (self.chunk_size // len(seed) + 1))[:self.chunk_size]
+            time.sleep(self.chunk_delay)
+
+    def text_to_speech(self, text: str) -> bytes:
+        return b"".join(self.text_to_speech_stream(text))
+
+
+def percentiles(values: list) -> dict:
+    """Returns count, p50/p90/p99/max and mean of a list of seconds, in milliseconds."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def pick(pct):
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": pick(50),
+        "p90_ms": pick(90),
+        "p99_ms": pick(99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def write_synthetic_match(path: str, num_events: int, spacing: float, seed: int):
+    """Writes a JSONL match of `num_events` events, `spacing` seconds apart."""
+    rng = random.Random(seed)
+    home, away = 0, 0
+    with open(path, "w", encoding="utf-8") as f:
+        for index in range(num_events):
+            if index == 0:
+                event = {"event_type": "kick_off"}
+            elif index == num_events - 1:
+                event = {"event_type": "end_game"}
+            else:
+                event_type = rng.choice(SYNTHETIC_EVENT_TYPES)
+                team = rng.choice(["Al Nassr", "Inter Miami"])
+                event = {"event_type": event_type, "team": team, "player": f"Player {rng.randint(1, 11)}"}
+                if event_type == "shot_on_goal":
+                    event["outcome"] = rng.choice(["scored", "missed"])
+                    if event["outcome"] == "scored":
+                        home, away = (home + 1, away) if team == "Al Nassr" else (home, away + 1)
+                elif event_type == "foul":
+                    event["fouled_player"] = f"Player {rng.randint(1, 11)}"
+                elif event_type == "substitution":
+                    event["metadata"] = {"player_out": f"Player {rng.randint(1, 11)}", "player_in": f"Player {rng.randint(12, 23)}"}
+            event.update({"time": index * spacing, "sport": "Football", "score": f"{home}-{away}"})
+            f.write(json.dumps(event) + "\n")
+
+
+def parse_frames(chunks):
+    """Yields (event name, data dict) for each SSE frame in a stream of byte chunks."""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk.decode("utf-8")
+        while "\n\n" in buffer:
+            raw, buffer = buffer.split("\n\n", 1)
+            name, data = "message", {}
+            for line in raw.split("\n"):
+                if line.startswith("event: "):
+                    name = line[len("event: "):]
+                elif line.startswith("data: "):
+                    data = json.loads(line[len("data: "):])
+            yield name, data
+
+
+class Viewer(threading.Thread):
+    """One simulated browser: selects a profile, follows the match stream, then fetches some audio."""
+    def __init__(self, number: int, match_id: str, speed: str, audio_fetches: int,
+                 start_barrier: threading.Barrier):
+        super().__init__(name=f"viewer-{number}", daemon=True)
+        self.style = STYLES[number % len(STYLES)]
+        self.match_id = match_id
+        self.speed = speed
+        self.audio_fetches = audio_fetches
+        self.start_barrier = start_barrier
+        self.select_latency = None
+        self.first_frame_latencies = []
+        self.final_frame_latencies = []
+        self.audio_first_byte = []
+        self.audio_total = []
+        self.frames = 0
+        self.errors = []
+
+    def _lateness(self, data: dict, now: float):
+        broadcaster = sportsync.broadcast_hub.find(self.match_id)
+        if broadcaster is None or broadcaster.started_at is None or broadcaster.replay_speed == 0:
+            return None
+        return now - (broadcaster.started_at + data["time"] / broadcaster.replay_speed)
+
+    def run(self):
+        client = sportsync.app.test_client()
+        started = time.time()
+        client.post("/select_profile", data={"profile": self.style})
+        self.select_latency = time.time() - started
+        self.start_barrier.wait()
+
+        seen, final_lines = set(), []
+        response = client.get(f"/start_game?match={self.match_id}&speed={self.speed}", buffered=False)
+        try:
+            for name, data in parse_frames(response.iter_encoded()):
+                now = time.time()
+                self.frames += 1
+                if name == "error":
+                    self.errors.append(data.get("error"))
+                    break
+                if name == "end":
+                    break
+                lateness = self._lateness(data, now) if "time" in data else None
+                if lateness is None:
+                    continue
+                if data["event_index"] not in seen:
+                    seen.add(data["event_index"])
+                    self.first_frame_latencies.append(lateness)
+                if name in ("complete", "upgrade"):
+                    self.final_frame_latencies.append(lateness)
+                    final_lines.append(data["event_index"])
+        finally:
+            response.close()
+
+        for event_index in final_lines[:self.audio_fetches]:
+            started = time.time()
+            audio = client.get(f"/audio/{self.match_id}/{event_index}?style={self.style}", buffered=False)
+            first_byte = None
+            for chunk in audio.iter_encoded():
+                if first_byte is None and chunk:
+                    first_byte = time.time() - started
+            audio.close()
+            if first_byte is not None:
+                self.audio_first_byte.append(first_byte)
+                self.audio_total.append(time.time() - started)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmark(args) -> dict:
+    llm = StubLLMClient(args.llm_latency, args.llm_jitter, args.token_delay, args.llm_failure_rate, args.seed)
+    tts = StubTTSClient(args.tts_latency)
+
+    def stub_qloo(user_data: dict) -> dict:
+        time.sleep(args.qloo_latency)
+        return style_profile(user_data.get("preference_type", "balanced"))
+
+    # Swap the stand-ins into the app's module globals; the routes look them up per request
+    generator = CommentaryGenerator(llm, cache=CommentaryCache())
+    sportsync.commentary_generator = generator
+    sportsync.broadcast_hub = BroadcastHub(
+        generator, lookahead=args.lookahead, stream_tokens=not args.no_stream_tokens,
+        batch_styles=not args.no_batch_styles, instant_templates=not args.no_templates
+    )
+    sportsync.gtts_client = CachedTTSClient(tts, AudioCache())
+    sportsync.profile_cache.loader = stub_qloo
+
+    match_dir = tempfile.mkdtemp(prefix="sportsync-bench-")
+    sportsync.MATCH_DIR = match_dir
+    match_ids = [f"bench-{number}" for number in range(args.matches)]
+    for number, match_id in enumerate(match_ids):
+        write_synthetic_match(os.path.join(match_dir, f"{match_id}.jsonl"), args.events, args.event_spacing,
+                              args.seed + number)
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    barrier = threading.Barrier(args.clients)
+    viewers = [
+        Viewer(number, match_ids[number % args.matches], args.speed, args.audio_fetches, barrier)
+        for number in range(args.clients)
+    ]
+    started = time.time()
+    for viewer in viewers:
+        viewer.start()
+    for viewer in viewers:
+        viewer.join()
+    wall_seconds = time.time() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    emit_lateness, events_emitted = [], 0
+    for match_id in match_ids:
+        broadcaster = sportsync.broadcast_hub.find(match_id)
+        if broadcaster is not None:
+            emit_lateness.extend(broadcaster.emit_lateness.values())
+            events_emitted += len(broadcaster.emit_lateness)
+
+    frames = sum(viewer.frames for viewer in viewers)
+    return {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": vars(args),
+        "results": {
+            "wall_seconds": wall_seconds,
+            "events_emitted": events_emitted,
+            "frames_received": frames,
+            "throughput_frames_per_second": frames / wall_seconds,
+            "throughput_events_per_second": events_emitted / wall_seconds,
+            "server_emit_lateness": percentiles(emit_lateness),
+            "first_commentary_latency": percentiles([v for viewer in viewers for v in viewer.first_frame_latencies]),
+            "final_commentary_latency": percentiles([v for viewer in viewers for v in viewer.final_frame_latencies]),
+            "select_profile_latency": percentiles([viewer.select_latency for viewer in viewers]),
+            "audio_first_byte_latency": percentiles([v for viewer in viewers for v in viewer.audio_first_byte]),
+            "audio_total_latency": percentiles([v for viewer in viewers for v in viewer.audio_total]),
+            "llm_calls": llm.calls,
+            "llm_calls_per_event": llm.calls / events_emitted if events_emitted else None,
+            "tts_calls": tts.calls,
+            "peak_traced_bytes_per_connection": (peak - baseline) / args.clients,
+            "commentary_cache": generator.cache.stats(),
+            "audio_cache": sportsync.gtts_client.cache.stats(),
+            "scheduler": sportsync.broadcast_hub.scheduler.stats(),
+            "viewer_errors": sorted({error for viewer in viewers for error in viewer.errors}),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load benchmark with stub LLM, Qloo and TTS clients.")
+    parser.add_argument("--clients", type=int, default=50, help="concurrent simulated SSE viewers")
+    parser.add_argument("--matches", type=int, default=1, help="viewers are spread round-robin over this many matches")
+    parser.add_argument("--events", type=int, default=20, help="events per synthetic match")
+    parser.add_argument("--event-spacing", type=float, default=10.0, help="match seconds between events")
+    parser.add_argument("--speed", default="20", help="replay speed passed to /start_game (e.g. 20 or max)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds before the stub LLM answers")
+    parser.add_argument("--llm-jitter", type=float, default=0.2, help="extra random latency, up to this many seconds")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="seconds between streamed tokens")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0, help="fraction of LLM calls that fail")
+    parser.add_argument("--tts-latency", type=float, default=0.2, help="seconds before stub audio starts")
+    parser.add_argument("--qloo-latency", type=float, default=0.05, help="seconds per stub taste profile lookup")
+    parser.add_argument("--audio-fetches", type=int, default=1, help="audio clips each viewer fetches after the match")
+    parser.add_argument("--lookahead", type=int, default=3)
+    parser.add_argument("--no-stream-tokens", action="store_true")
+    parser.add_argument("--no-batch-styles", action="store_true")
+    parser.add_argument("--no-templates", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json", help="where to save the JSON results")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print(json.dumps(report["results"], indent=2))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
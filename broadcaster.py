@@ -0,0 +1,718 @@
+# broadcaster.py
+
+import asyncio
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+import functools
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+
+from api_clients import LLM_FALLBACK_RESPONSES, StreamInterrupted
+from commentary_templates import render_commentary
+from event_scheduler import DeadlineScheduler, is_coalesced
+from event_sources import AS_FAST_AS_POSSIBLE
+from lookahead import CommentaryPrefetcher, DEFAULT_LOOKAHEAD_EVENTS, create_live_executor, create_prefetch_executor
+from match_clock import MatchClock
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Each SSE connection gets its own bounded queue. A client that falls this many
+# frames behind is dropped instead of holding up every other viewer of the match.
+SUBSCRIBER_QUEUE_SIZE = 32
+# Recent frames kept per match, so a reconnecting client can catch up from its Last-Event-ID.
+# Only whole lines are kept (not `delta` frames), since the final frame of a line supersedes its deltas.
+REPLAY_BUFFER_FRAMES = 512
+# After a viewer disconnects, their style keeps being generated (and a match left
+# with no viewers keeps running) for this long, so a quick reconnect can resume
+RECONNECT_GRACE_SECONDS = 30.0
+# Finished matches kept for audio lookups and late reconnects; each holds its replay
+# buffer and commentary, and match ids can be user-supplied, so the least recently
+# used are forgotten beyond this
+FINISHED_MATCHES_KEPT = 64
+
+
+def format_sse(data: dict, event: str = None) -> str:
+    """Formats a payload as a single Server-Sent Events frame."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def _when_all(futures: list, callback):
+    """Calls `callback()` once every future in `futures` is done (straight away if there are none)."""
+    remaining = len(futures)
+    if remaining == 0:
+        callback()
+        return
+    lock = threading.Lock()
+
+    def one_done(_future):
+        nonlocal remaining
+        with lock:
+            remaining -= 1
+            if remaining:
+                return
+        callback()
+
+    for future in futures:
+        future.add_done_callback(one_done)
+
+
+class Subscriber:
+    """
+    A single SSE connection listening to a match.
+    The match producer pushes frames into the queue and the connection's
+    response generator pulls them out.
+    """
+    def __init__(self, user_taste_profile: dict, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self.profile = user_taste_profile
+        self.style = user_taste_profile.get("style", "balanced")
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.closed = False
+
+    def offer(self, frame: str) -> bool:
+        """Queues a frame without blocking. Returns False if the client is too slow to keep up."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except queue.Full:
+            return False
+
+    def close(self, final_frame: str = None):
+        """
+        Ends the stream after an optional final frame.
+        If the queue is full, pending frames are discarded so the sentinel always fits.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        frames = [final_frame, None] if final_frame else [None]
+        try:
+            for frame in frames:
+                self.queue.put_nowait(frame)
+        except queue.Full:
+            while True:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            for frame in frames:
+                self.queue.put_nowait(frame)
+
+    def frames(self):
+        """Yields queued frames until the stream is closed."""
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                return
+            yield frame
+
+
+class AsyncSubscriber(Subscriber):
+    """
+    Subscriber for connections served on an asyncio event loop (the ASGI server).
+    The producer thread still pushes into the bounded queue; the event loop is
+    woken to drain it, so an idle connection holds no thread.
+    """
+    def __init__(self, user_taste_profile: dict, loop: asyncio.AbstractEventLoop,
+                 maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        super().__init__(user_taste_profile, maxsize)
+        self.loop = loop
+        self._ready = asyncio.Event()
+
+    def _notify(self):
+        try:
+            self.loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            pass # Event loop already closed, nobody is listening anymore
+
+    def offer(self, frame: str) -> bool:
+        queued = super().offer(frame)
+        if queued:
+            self._notify()
+        return queued
+
+    def close(self, final_frame: str = None):
+        super().close(final_frame)
+        self._notify()
+
+    async def frames_async(self):
+        """Yields queued frames until the stream is closed, without blocking the event loop."""
+        while True:
+            try:
+                frame = self.queue.get_nowait()
+            except queue.Empty:
+                self._ready.clear()
+                # Re-check after clearing so a frame offered in between isn't missed
+                if self.queue.empty():
+                    await self._ready.wait()
+                continue
+            if frame is None:
+                return
+            yield frame
+
+
+class MatchBroadcaster:
+    """
+    Plays one match and fans its commentary out to every subscriber.
+    Commentary is generated once per (event, taste style) pair, so LLM usage
+    grows with the number of distinct styles rather than the number of viewers.
+    Generation for the next `lookahead` events starts ahead of their scheduled
+    time, and each event is emitted at its timestamp divided by `replay_speed`
+    (AS_FAST_AS_POSSIBLE skips the waits). `events` is any iterable, usually an
+    EventSource, and is consumed lazily. Commentary that wasn't
+    prefetched is streamed as `delta` frames when `stream_tokens` is set.
+    With `batch_styles`, all styles of a prefetched event share one LLM call.
+    If a DeadlineScheduler is given, events that pile up behind a slow emit are
+    prioritised, coalesced or dropped instead of being played strictly in order.
+    With `instant_templates`, a style whose LLM text isn't ready at emit time
+    first gets a `template` frame rendered from commentary_templates, then an
+    `upgrade` frame replacing it once the LLM answers (skipped if the LLM failed).
+    A line the LLM failed to produce is always sent, and voiced, as its template text.
+    With a ReplayBundle, baked styles are emitted straight from the bundle and
+    only styles missing from it are generated.
+    Every frame carries an SSE id of the form "<run_id>:<sequence>", and the
+    last REPLAY_BUFFER_FRAMES frames are kept so a reconnecting client can be
+    sent just the frames it missed (see subscribe's `after`).
+    The match has no thread of its own: each step (read ahead, wait, emit) is
+    a timer on the shared MatchClock and runs on its dispatch pool. Steps of
+    one match are chained, so they never overlap. An emit doesn't hold a
+    dispatch worker while the LLM answers: final frames are published from the
+    generation futures' callbacks, and the next event is put on the clock only
+    after the last of them is out. Live sources block between
+    events and get a small reader thread that hands events to the clock.
+    """
+    def __init__(self, match_id: str, events, commentary_generator, executor,
+                 lookahead: int = DEFAULT_LOOKAHEAD_EVENTS, stream_tokens: bool = True, batch_styles: bool = True,
+                 replay_speed: float = 1.0, scheduler=None, on_finished=None, instant_templates: bool = True,
+                 bundle=None, reconnect_grace_seconds: float = RECONNECT_GRACE_SECONDS, clock: MatchClock = None,
+                 live_executor=None):
+        self.match_id = match_id
+        # Distinguishes this run's frame ids from those of earlier runs of the same match
+        self.run_id = uuid.uuid4().hex[:12]
+        self.events = events
+        self.executor = executor
+        # Generation viewers are already waiting on runs here, apart from prefetch work
+        self.live_executor = live_executor or executor
+        self.clock = clock or MatchClock()
+        self.prefetcher = CommentaryPrefetcher(commentary_generator, executor, batch_styles=batch_styles,
+                                               live_executor=self.live_executor)
+        # Live sources deliver events as they happen: emit on arrival and never read ahead
+        self.live = getattr(events, "live", False)
+        self.lookahead = 0 if self.live else lookahead
+        self.replay_speed = replay_speed
+        self.scheduler = scheduler
+        self.stream_tokens = stream_tokens
+        self.instant_templates = instant_templates
+        self.bundle = bundle
+        self.reconnect_grace_seconds = reconnect_grace_seconds
+        self.on_finished = on_finished
+        self.finished = False
+        self._final_frame = None
+        # Wall-clock time the replay started; event N is due at started_at + time / replay_speed
+        self.started_at = None
+        # Emit lateness (actual emit time minus scheduled time) in seconds, per event index
+        self.emit_lateness = {}
+        # Final commentary text per (event index, style), used to voice lines on request
+        self.commentary = {}
+        self._subscribers = []
+        self._sequence = 0
+        self._history = deque(maxlen=REPLAY_BUFFER_FRAMES)  # (sequence, style, frame)
+        self._evicted_through = 0  # highest sequence number pushed out of the replay buffer
+        self._departed = {}  # style -> (profile, time its last viewer left)
+        self._idle_since = None
+        self._lock = threading.Lock()
+        # Read-ahead window of (index, event), and the source it is filled from
+        self._upcoming = deque()
+        self._next_index = 0
+        self._events_iter = None
+        self._feed = queue.Queue()  # live events handed over by the reader thread; None ends the feed
+        self._feed_done = False
+        # True while a step of this match is scheduled or running
+        self._step_pending = False
+
+    def subscribe(self, user_taste_profile: dict, loop: asyncio.AbstractEventLoop = None, after: int = None):
+        """
+        Adds a subscriber. Returns None if the match has already finished.
+        Pass the running event loop to get an AsyncSubscriber for async servers.
+        `after` resumes a reconnecting client: buffered frames for its style with
+        a later sequence number are queued first. A resumed subscriber of a
+        finished match gets those frames and then the final frame. If frames it
+        missed have already left the buffer, it is sent a `resync` frame first so
+        the gap isn't silent.
+        """
+        style = user_taste_profile.get("style", "balanced")
+        with self._lock:
+            if self.finished and after is None:
+                return None
+            missed = []
+            if after is not None:
+                missed = [frame for sequence, frame_style, frame in self._history
+                          if sequence > after and frame_style in (None, style)]
+                if after < self._evicted_through:
+                    logger.info("Client resuming match %s after frame %d missed evicted frames", self.match_id, after)
+                    metrics.ERRORS.inc(component="replay_gap")
+                    missed.insert(0, format_sse({"message": "Some commentary was missed while reconnecting."},
+                                                event="resync"))
+            maxsize = SUBSCRIBER_QUEUE_SIZE + len(missed)
+            if loop is not None:
+                subscriber = AsyncSubscriber(user_taste_profile, loop, maxsize)
+            else:
+                subscriber = Subscriber(user_taste_profile, maxsize)
+            for frame in missed:
+                subscriber.offer(frame)
+            if self.finished:
+                subscriber.close(self._final_frame)
+                return subscriber
+            self._subscribers.append(subscriber)
+            self._idle_since = None
+            return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._remove_locked(subscriber)
+        subscriber.close()
+
+    def _remove_locked(self, subscriber: Subscriber):
+        """Removes a subscriber (caller holds the lock) and starts its reconnect grace period."""
+        if subscriber not in self._subscribers:
+            return
+        self._subscribers.remove(subscriber)
+        now = time.time()
+        self._departed[subscriber.style] = (subscriber.profile, now)
+        if not self._subscribers:
+            self._idle_since = now
+
+    def start(self):
+        metrics.RUNNING_MATCHES.inc()
+        self.started_at = time.time()
+        if self.live:
+            threading.Thread(target=self._read_feed, name=f"feed-{self.match_id}", daemon=True).start()
+        else:
+            self._events_iter = iter(self.events)
+            self._wake()
+
+    def _read_feed(self):
+        """Blocks on a live source and hands each event to the clock as it arrives."""
+        try:
+            for event in self.events:
+                if self.finished:
+                    return
+                self._feed.put(event)
+                self._wake()
+        except Exception as e:
+            logger.error("Error reading live feed for match %s: %s", self.match_id, e)
+            metrics.ERRORS.inc(component="live_feed")
+        finally:
+            self._feed.put(None)
+            self._wake()
+
+    def _wake(self):
+        """Schedules the next step unless one is already scheduled or running."""
+        with self._lock:
+            if self._step_pending or self.finished:
+                return
+            self._step_pending = True
+        self.clock.call_soon(self._advance)
+
+    def _styles(self) -> dict:
+        """
+        Returns one taste profile per distinct style among the current subscribers,
+        plus the styles of viewers who left within the reconnect grace period.
+        """
+        now = time.time()
+        styles = {}
+        with self._lock:
+            for subscriber in self._subscribers:
+                styles.setdefault(subscriber.style, subscriber.profile)
+            for style, (profile, left_at) in list(self._departed.items()):
+                if now - left_at > self.reconnect_grace_seconds:
+                    del self._departed[style]
+                else:
+                    styles.setdefault(style, profile)
+        return styles
+
+    def _abandoned(self) -> bool:
+        """True once the match has had no viewers for longer than the reconnect grace period."""
+        with self._lock:
+            return (not self._subscribers and self._idle_since is not None
+                    and time.time() - self._idle_since > self.reconnect_grace_seconds)
+
+    def _unbaked(self, index: int, styles: dict, event: dict = None) -> dict:
+        """Filters out styles whose commentary for this event is in the replay bundle."""
+        # A summary reuses a merged event's index, but the bundle only holds that single event's line
+        if self.bundle is None or (event is not None and is_coalesced(event)):
+            return styles
+        return {style: profile for style, profile in styles.items() if not self.bundle.has(index, style)}
+
+    def _publish(self, frame: str, style: str = None, replayable: bool = True):
+        """
+        Numbers a frame, keeps it in the replay buffer (unless `replayable` is
+        False) and sends it to every subscriber of the given style (or to
+        everyone if style is None).
+        """
+        with self._lock:
+            self._sequence += 1
+            frame = f"id: {self.run_id}:{self._sequence}\n{frame}"
+            if replayable:
+                if len(self._history) == self._history.maxlen:
+                    self._evicted_through = self._history[0][0]
+                self._history.append((self._sequence, style, frame))
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            if style is not None and subscriber.style != style:
+                continue
+            if not subscriber.offer(frame):
+                logger.warning("Dropping slow subscriber from match %s", self.match_id)
+                metrics.ERRORS.inc(component="slow_subscriber")
+                self._drop(subscriber, "Connection too slow, dropped from live commentary.")
+
+    def _drop(self, subscriber: Subscriber, message: str):
+        with self._lock:
+            self._remove_locked(subscriber)
+        subscriber.close(format_sse({"error": message}, event="error"))
+
+    def _scheduled_at(self, event: dict) -> float:
+        if self.live or self.replay_speed == AS_FAST_AS_POSSIBLE:
+            return time.time()
+        return self.started_at + event["time"] / self.replay_speed
+
+    def _fill_window(self):
+        """Keeps the current event plus `lookahead` upcoming ones in the window, without blocking."""
+        while len(self._upcoming) <= self.lookahead:
+            if self.live:
+                try:
+                    event = self._feed.get_nowait()
+                except queue.Empty:
+                    return
+                if event is None:
+                    self._feed_done = True
+                    return
+            else:
+                event = next(self._events_iter, None)
+                if event is None:
+                    return
+            self._upcoming.append((self._next_index, event))
+            self._next_index += 1
+
+    def _advance(self):
+        """Step run on the dispatch pool: refills and prefetches the window, then puts the next event on the clock."""
+        try:
+            if self.finished:
+                return
+            self._fill_window()
+            if not self._upcoming:
+                if self.live and not self._feed_done:
+                    # Wait for the reader thread; re-check so an event it queued meanwhile isn't missed
+                    with self._lock:
+                        self._step_pending = False
+                    if not self._feed.empty():
+                        self._wake()
+                    return
+                self._finish(format_sse({"message": "Game ended"}, event="end"))
+                return
+
+            if self.lookahead > 0:
+                styles = self._styles()
+                for index, event in self._upcoming:
+                    self.prefetcher.prefetch(index, event, self._unbaked(index, styles))
+
+            index, event = self._upcoming.popleft()
+            scheduled_at = self._scheduled_at(event)
+            self.clock.call_at(scheduled_at, self._on_due, index, event, scheduled_at)
+        except Exception as e:
+            self._fail(e)
+
+    def _on_due(self, index: int, event: dict, scheduled_at: float):
+        """Step run when an event falls due: triages any backlog, then starts emitting what is due."""
+        try:
+            if self._abandoned():
+                logger.info("No viewers left for match %s, stopping.", self.match_id)
+                self._finish(format_sse({"message": "Game ended"}, event="end"))
+                return
+
+            due = [(index, event, scheduled_at)]
+            # Paced replays can fall behind real time when generation is slow;
+            # collect everything that's already due and let the scheduler triage it
+            if self.scheduler is not None and not self.live and self.replay_speed != AS_FAST_AS_POSSIBLE:
+                now = time.time()
+                while True:
+                    self._fill_window()
+                    if not self._upcoming or self._scheduled_at(self._upcoming[0][1]) > now:
+                        break
+                    due_index, due_event = self._upcoming.popleft()
+                    due.append((due_index, due_event, self._scheduled_at(due_event)))
+                due, discarded = self.scheduler.plan(due, now)
+                for discarded_index in discarded:
+                    self.prefetcher.discard(discarded_index)
+
+        except Exception as e:
+            self._fail(e)
+            return
+        self._emit_next(due)
+
+    def _emit_next(self, due: list):
+        """
+        Step that emits the first of the due events. The rest follow, and then
+        `_advance`, only once all of its frames are out, so events stay in order
+        without a dispatch worker waiting on the LLM in between.
+        """
+        try:
+            if self.finished:
+                return
+            if not due:
+                self._advance()
+                return
+            (index, event, scheduled_at), rest = due[0], due[1:]
+            logger.debug("Match %s event %d at %ss: %s by %s", self.match_id, index, event['time'],
+                         event.get('event_type', 'N/A'), event.get('player', 'N/A'))
+            self._emit(index, event, scheduled_at, on_done=lambda: self.clock.call_soon(self._emit_next, rest))
+        except Exception as e:
+            self._fail(e)
+
+    def _fail(self, error: Exception):
+        logger.error("Error in match %s: %s", self.match_id, error, exc_info=error)
+        metrics.ERRORS.inc(component="broadcaster")
+        self._finish(format_sse({"error": "Commentary stream failed."}, event="error"))
+
+    def _emit(self, index: int, event: dict, scheduled_at: float, on_done=None):
+        """
+        Publishes the event's frames without blocking: text that is still being
+        generated is published from its future's callback, and `on_done` is
+        called once the last frame for the event has gone out.
+        """
+        styles = self._styles()
+        unbaked = self._unbaked(index, styles, event)
+        for style in styles:
+            if style not in unbaked:
+                self._publish(self._complete_frame(index, event, style, self.bundle.text(index, style)), style=style)
+        styles = unbaked
+
+        templated = set()
+        if self.instant_templates:
+            # Viewers get a line straight away unless the LLM text is already waiting
+            for style in styles:
+                if not self.prefetcher.ready(index, style):
+                    self._publish(self._template_frame(index, event, style), style=style)
+                    templated.add(style)
+
+        streams = []
+        if self.stream_tokens:
+            # Styles without prefetched text stream their tokens to viewers as they arrive
+            for style, profile in styles.items():
+                if not self.prefetcher.has(index, style):
+                    streams.append(self.live_executor.submit(
+                        self._stream_style, index, event, style, profile, style in templated
+                    ))
+        else:
+            # Styles that joined after the lookahead window passed are generated now, in parallel
+            self.prefetcher.prefetch(index, event, styles, live=True)
+
+        pending = list(streams)
+        for style in styles:
+            future = self.prefetcher.take(index, style)
+            if future is None:
+                continue
+            future.add_done_callback(functools.partial(self._publish_result, index, event, style, style in templated))
+            pending.append(future)
+        # Results for styles whose viewers all left are no longer needed
+        self.prefetcher.discard(index)
+
+        def emitted():
+            for stream in streams:
+                if not stream.cancelled() and stream.exception() is not None:
+                    self._fail(stream.exception())
+            lateness = time.time() - scheduled_at
+            self.emit_lateness[index] = lateness
+            metrics.EMIT_LATENESS_SECONDS.observe(lateness)
+            logger.debug("Emit lateness for event %d (%s): %.0f ms", index, event['event_type'], lateness * 1000)
+            if on_done is not None:
+                on_done()
+
+        _when_all(pending, emitted)
+
+    def _publish_result(self, index: int, event: dict, style: str, upgrade: bool, future: Future):
+        """Done-callback of a prefetched style: publishes its final frame, or fails the match if generation raised."""
+        if future.cancelled() or self.finished:
+            return
+        try:
+            commentary_text = future.result()
+            logger.debug("Commentary for event %d (%s): %s", index, style, commentary_text)
+            frame = self._complete_frame(index, event, style, commentary_text, upgrade=upgrade)
+            if frame:
+                self._publish(frame, style=style)
+        except Exception as e:
+            self._fail(e)
+
+    def _stream_style(self, index: int, event: dict, style: str, profile: dict, upgrade: bool = False):
+        """
+        Publishes `delta` frames as LLM chunks arrive, then the `complete` (or `upgrade`) frame.
+        If the stream breaks part-way, the final frame carries the template line instead of the partial text.
+        """
+        parts = []
+        try:
+            for chunk in self.prefetcher.commentary_generator.stream_commentary(event, profile):
+                parts.append(chunk)
+                if chunk in LLM_FALLBACK_RESPONSES:
+                    # Never stream an error placeholder; the final frame carries the template line instead
+                    continue
+                delta = {
+                    "event_index": index,
+                    "time": event["time"],
+                    "event_type": event["event_type"],
+                    "delta": chunk,
+                    "profile_style": style
+                }
+                self._publish(format_sse(delta, event="delta"), style=style, replayable=False)
+        except StreamInterrupted as e:
+            logger.warning("Commentary stream for event %d (%s) broke off: %s", index, style, e)
+            parts = [render_commentary(event, style)]
+        commentary_text = "".join(parts)
+        logger.debug("Streamed commentary for event %d (%s): %s", index, style, commentary_text)
+        frame = self._complete_frame(index, event, style, commentary_text, upgrade=upgrade)
+        if frame:
+            self._publish(frame, style=style)
+
+    def _template_frame(self, index: int, event: dict, style: str) -> str:
+        """Renders the instant template line, records it for the audio endpoint and builds the `template` frame."""
+        commentary_text = render_commentary(event, style)
+        self.commentary[(index, style)] = commentary_text
+        data = {
+            "event_index": index,
+            "time": event["time"],
+            "event_type": event["event_type"],
+            "commentary": commentary_text,
+            "profile_style": style
+        }
+        return format_sse(data, event="template")
+
+    def _complete_frame(self, index: int, event: dict, style: str, commentary_text: str, upgrade: bool = False):
+        """
+        Records the final text for the audio endpoint and builds the `complete` frame,
+        or the `upgrade` frame if a template line was already sent. An LLM error
+        placeholder is never sent or voiced: the template line stands in for it,
+        and an upgrade that would only replace the template returns None.
+        """
+        if commentary_text in LLM_FALLBACK_RESPONSES:
+            if upgrade:
+                return None
+            commentary_text = render_commentary(event, style)
+        self.commentary[(index, style)] = commentary_text
+        data = {
+            "event_index": index,
+            "time": event["time"],
+            "event_type": event["event_type"],
+            "commentary": commentary_text,
+            "profile_style": style
+        }
+        return format_sse(data, event="upgrade" if upgrade else "complete")
+
+    def _finish(self, final_frame: str):
+        with self._lock:
+            if self.finished:
+                return
+            self.finished = True
+            self._final_frame = final_frame
+            subscribers, self._subscribers = self._subscribers, []
+        metrics.RUNNING_MATCHES.dec()
+        for subscriber in subscribers:
+            subscriber.close(final_frame)
+        self.prefetcher.discard()
+        if self.emit_lateness:
+            worst = max(self.emit_lateness.values())
+            average = sum(self.emit_lateness.values()) / len(self.emit_lateness)
+            logger.info("Match %s emit lateness: avg %.0f ms, max %.0f ms", self.match_id, average * 1000, worst * 1000)
+        if self.on_finished:
+            self.on_finished(self)
+
+
+class BroadcastHub:
+    """
+    Registry of running matches. The first viewer of a match starts its
+    broadcaster; later viewers join the same live stream.
+    All matches share one worker pool for prefetching commentary, one for
+    generation viewers are waiting on, and one MatchClock that times their events.
+    The most recently finished broadcaster of each match is kept so its
+    commentary can still be looked up after the game ends, for up to
+    `max_finished` matches (least recently used are dropped first).
+    """
+    def __init__(self, commentary_generator, lookahead: int = DEFAULT_LOOKAHEAD_EVENTS, stream_tokens: bool = True,
+                 batch_styles: bool = True, executor=None, instant_templates: bool = True, clock: MatchClock = None,
+                 live_executor=None, max_finished: int = FINISHED_MATCHES_KEPT):
+        self.commentary_generator = commentary_generator
+        self.lookahead = lookahead
+        self.stream_tokens = stream_tokens
+        self.batch_styles = batch_styles
+        self.instant_templates = instant_templates
+        self.executor = executor or create_prefetch_executor()
+        self.live_executor = live_executor or create_live_executor()
+        self.clock = clock or MatchClock()
+        # Shared by all matches so its dropped/coalesced/late counters cover the whole process
+        self.scheduler = DeadlineScheduler()
+        self._matches = {}
+        self.max_finished = max_finished
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+
+    def find(self, match_id: str):
+        """Returns the running broadcaster for a match, else its last finished one, else None."""
+        with self._lock:
+            broadcaster = self._matches.get(match_id)
+            if broadcaster is None and match_id in self._finished:
+                self._finished.move_to_end(match_id)
+                broadcaster = self._finished[match_id]
+            return broadcaster
+
+    def subscribe(self, match_id: str, events, user_taste_profile: dict, loop: asyncio.AbstractEventLoop = None,
+                  replay_speed: float = 1.0, bundle=None):
+        """
+        Returns (broadcaster, subscriber), starting the match if it isn't already running.
+        `events`, `replay_speed` and `bundle` are only used when this call starts the match.
+        """
+        with self._lock:
+            broadcaster = self._matches.get(match_id)
+            subscriber = broadcaster.subscribe(user_taste_profile, loop) if broadcaster else None
+            if subscriber is None:
+                broadcaster = MatchBroadcaster(
+                    match_id, events, self.commentary_generator, self.executor,
+                    lookahead=self.lookahead, stream_tokens=self.stream_tokens,
+                    batch_styles=self.batch_styles, replay_speed=replay_speed, scheduler=self.scheduler,
+                    on_finished=self._remove, instant_templates=self.instant_templates, bundle=bundle,
+                    clock=self.clock, live_executor=self.live_executor
+                )
+                subscriber = broadcaster.subscribe(user_taste_profile, loop)
+                self._matches[match_id] = broadcaster
+                broadcaster.start()
+        return broadcaster, subscriber
+
+    def resume(self, match_id: str, last_event_id: str, user_taste_profile: dict,
+               loop: asyncio.AbstractEventLoop = None):
+        """
+        Reattaches a reconnecting client to the run its Last-Event-ID came from,
+        replaying only the frames it missed. Returns (broadcaster, subscriber), or
+        None if the id is malformed or that run is no longer known.
+        """
+        run_id, _, sequence = (last_event_id or "").partition(":")
+        if not sequence.isdigit():
+            return None
+        with self._lock:
+            candidates = (self._matches.get(match_id), self._finished.get(match_id))
+            broadcaster = next((b for b in candidates if b is not None and b.run_id == run_id), None)
+        if broadcaster is None:
+            return None
+        return broadcaster, broadcaster.subscribe(user_taste_profile, loop, after=int(sequence))
+
+    def _remove(self, broadcaster: MatchBroadcaster):
+        with self._lock:
+            if self._matches.get(broadcaster.match_id) is broadcaster:
+                del self._matches[broadcaster.match_id]
+            self._finished[broadcaster.match_id] = broadcaster
+            self._finished.move_to_end(broadcaster.match_id)
+            while len(self._finished) > self.max_finished:
+                self._finished.popitem(last=False)
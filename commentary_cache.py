@@ -0,0 +1,115 @@
+# commentary_cache.py
+
+from collections import OrderedDict
+import hashlib
+import sqlite3
+import threading
+import time
+
+import metrics
+
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapses whitespace so prompts that differ only in formatting share a cache entry."""
+    return " ".join(prompt.split())
+
+
+class CommentaryCache:
+    """
+    Content-addressed cache for LLM commentary.
+    Entries are keyed on a hash of the normalized prompt plus the model identity,
+    held in an in-memory LRU with size and TTL limits, and optionally persisted
+    to a SQLite file so replays survive restarts.
+    """
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 db_path: str = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (created_at, text)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS commentary (key TEXT PRIMARY KEY, text TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(prompt: str, model_id: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(model_id.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(normalize_prompt(prompt).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def get(self, key: str):
+        """Returns the cached text for `key`, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    metrics.CACHE_LOOKUPS.inc(cache="commentary", result="hit")
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+
+            if self._db is not None:
+                row = self._db.execute("SELECT text, created_at FROM commentary WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    text, created_at = row
+                    if not self._expired(created_at):
+                        self._store(key, text, created_at)
+                        self.disk_hits += 1
+                        metrics.CACHE_LOOKUPS.inc(cache="commentary", result="disk_hit")
+                        return text
+                    self._db.execute("DELETE FROM commentary WHERE key = ?", (key,))
+                    self._db.commit()
+                    self.expirations += 1
+
+            self.misses += 1
+            metrics.CACHE_LOOKUPS.inc(cache="commentary", result="miss")
+            return None
+
+    def put(self, key: str, text: str):
+        created_at = time.time()
+        with self._lock:
+            self._store(key, text, created_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO commentary (key, text, created_at) VALUES (?, ?, ?)",
+                    (key, text, created_at)
+                )
+                self._db.commit()
+
+    def _store(self, key: str, text: str, created_at: float):
+        self._entries[key] = (created_at, text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -1,23 +1,88 @@
 # commentary_generator.py
 
+import json
+import logging
+import time
+
+from api_clients import LLM_FALLBACK_RESPONSES
+from commentary_templates import render_description
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Base instruction shared by single-style and batch prompts
+COMMENTARY_INSTRUCTION = (
+    "Generate a live football commentary for the following event, using the provided match context and the user's taste profile. "
+    "Be specific and use the actual player and team names from the data. Avoid placeholders. Make the commentary engaging and natural, as if spoken by a real commentator. "
+    "If a field is missing, just omit it from the commentary. Do not use placeholders like [Team Name] or [Player's Name]."
+)
+# Token allowance per style when several styles are generated in one call
+BATCH_MAX_TOKENS_PER_STYLE = 120
+
 class CommentaryGenerator:
     """
     Generates tailored commentary prompts for an LLM based on game events
     and a user's Qloo-derived taste profile.
+    If a CommentaryCache is given, identical prompts are only sent to the LLM once.
     """
-    def __init__(self, openai_client):
+    def __init__(self, openai_client, cache=None):
         self.openai_client = openai_client
+        self.cache = cache
+        self._model_id = None
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the model in cache keys, so switching models doesn't serve stale text."""
+        # Resolved on first use, so a lazily built client isn't constructed at startup
+        if self._model_id is None:
+            self._model_id = getattr(self.openai_client, "model_name", type(self.openai_client).__name__)
+        return self._model_id
 
     def generate_prompt(self, event: dict, user_taste_profile: dict) -> str:
         """
         Crafts a detailed prompt for the LLM based on the game event
         and the user's preferred commentary style. Instructs the LLM to use actual player/team names and avoid placeholders.
         """
-        style = user_taste_profile.get("style", "balanced")
-        focus_areas = user_taste_profile.get("focus", ["general sports action"])
-
+        started = time.perf_counter()
         # Gather all event context for the LLM
-        context_lines = [
+        context_lines = self._context_lines(event) + [f"Taste Profile: {user_taste_profile.get('style', '')}"]
+        context_str = "\n".join(context_lines)
+        event_description = self._get_event_description(event)
+        style_instruction = self._style_instruction(user_taste_profile)
+
+        prompt = f"{COMMENTARY_INSTRUCTION}\n\nMatch/Event Context:\n{context_str}\n\nEvent Description: {event_description}\n\n{style_instruction}"
+        metrics.PROMPT_BUILD_SECONDS.observe(time.perf_counter() - started, kind="single")
+        return prompt
+
+    def generate_batch_prompt(self, event: dict, user_taste_profiles: dict) -> str:
+        """
+        Crafts one prompt asking for the same event in several styles at once.
+        `user_taste_profiles` maps style name -> taste profile. The LLM is asked
+        for a JSON object with one commentary string per style.
+        """
+        started = time.perf_counter()
+        context_str = "\n".join(self._context_lines(event))
+        event_description = self._get_event_description(event)
+        style_lines = [
+            f'- "{style}": {self._style_instruction(profile)}'
+            for style, profile in user_taste_profiles.items()
+        ]
+        style_names = ", ".join(f'"{style}"' for style in user_taste_profiles)
+        format_instruction = (
+            "Write one separate commentary for each of the styles below. "
+            f"Respond with only a JSON object whose keys are exactly {style_names} and whose values are the commentary strings. "
+            "Do not wrap the JSON in markdown or add any other text."
+        )
+
+        prompt = (
+            f"{COMMENTARY_INSTRUCTION}\n\nMatch/Event Context:\n{context_str}\n\nEvent Description: {event_description}"
+            f"\n\n{format_instruction}\n\nStyles:\n" + "\n".join(style_lines)
+        )
+        metrics.PROMPT_BUILD_SECONDS.observe(time.perf_counter() - started, kind="batch")
+        return prompt
+
+    def _context_lines(self, event: dict) -> list:
+        return [
             f"Event type: {event.get('event_type', '')}",
             f"Time: {event.get('time', '')} seconds",
             f"Score: {event.get('score', '')}",
@@ -25,17 +90,11 @@ class CommentaryGenerator:
             f"Team: {event.get('team', '')}",
             f"Outcome: {event.get('outcome', '')}",
             f"Metadata: {event.get('metadata', {})}",
-            f"Taste Profile: {user_taste_profile.get('style', '')}"
         ]
-        context_str = "\n".join(context_lines)
-        event_description = self._get_event_description(event)
 
-        # Refined instruction for the LLM
-        instruction = (
-            "Generate a live football commentary for the following event, using the provided match context and the user's taste profile. "
-            "Be specific and use the actual player and team names from the data. Avoid placeholders. Make the commentary engaging and natural, as if spoken by a real commentator. "
-            "If a field is missing, just omit it from the commentary. Do not use placeholders like [Team Name] or [Player's Name]."
-        )
+    def _style_instruction(self, user_taste_profile: dict) -> str:
+        style = user_taste_profile.get("style", "balanced")
+        focus_areas = user_taste_profile.get("focus", ["general sports action"])
 
         if style == "analytical":
             style_instruction = (
@@ -57,61 +116,126 @@ class CommentaryGenerator:
                 "Use a balanced style. Focus on the key action, player involvement, and immediate impact. "
                 "Keep it engaging and to the point. Use a standard, engaging sports commentary tone."
             )
+        return style_instruction
 
-        prompt = f"{instruction}\n\nMatch/Event Context:\n{context_str}\n\nEvent Description: {event_description}\n\n{style_instruction}"
-        return prompt
+    def parse_batch_response(self, response_text: str, styles) -> dict:
+        """
+        Extracts {style: commentary} from a batch response.
+        Only styles with a non-empty string value are returned; anything
+        unparseable yields an empty dict so callers can fall back.
+        """
+        text = response_text.strip()
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end <= start:
+            return {}
+        try:
+            parsed = json.loads(text[start:end + 1])
+        except ValueError:
+            return {}
+        if not isinstance(parsed, dict):
+            return {}
+
+        results = {}
+        for style in styles:
+            value = parsed.get(style)
+            if isinstance(value, str) and value.strip():
+                results[style] = value.strip()
+        return results
 
     def _get_event_description(self, event: dict) -> str:
         """
         Converts raw event data into a natural language description for the LLM.
-        Expand this function to handle more diverse event types and metadata.
+        Descriptions come from the precompiled table in commentary_templates;
+        add new event types there.
         """
-        event_type = event.get("event_type")
-        player = event.get("player")
-        team = event.get("team")
-        outcome = event.get("outcome")
-        fouled_player = event.get("fouled_player")
-        metadata = event.get("metadata", {})
-        score = event.get("score", "0-0") # Provide score for context
-
-        description = ""
-        if event_type == "kick_off":
-            description = f"The game kicks off! The score is {score}."
-        elif event_type == "shot_on_goal":
-            if outcome == "scored":
-                description = f"{player} of {team} scores a magnificent goal! The score is now {score}."
-                if metadata.get("shot_type"):
-                    description += f" It was a brilliant {metadata['shot_type']} shot."
-            else:
-                description = f"{player} of {team} takes a shot, but it's missed or saved! The score remains {score}."
-        elif event_type == "foul":
-            description = f"A foul committed by {player} of {team} on {fouled_player}."
-            if outcome:
-                description += f" The referee issues a {outcome.replace('_', ' ')}."
-        elif event_type == "possession_change":
-            description = f"Possession changes hands, now with {team}."
-        elif event_type == "halftime":
-            description = f"It's halftime! The score is {score}."
-        elif event_type == "end_game":
-            description = f"The game has ended! The final score is {score}."
-            # You might add logic here to determine winner/loser for commentary
-        elif event_type == "save":
-            description = f"Incredible save by the {team} goalkeeper against a shot from {player}! The score remains {score}."
-        elif event_type == "penalty":
-            description = f"Penalty awarded to {team}! {player} steps up to take it."
-        elif event_type == "corner":
-            description = f"Corner kick for {team}."
-        elif event_type == "substitution":
-            description = f"Substitution for {team}: {metadata.get('player_out')} off, {metadata.get('player_in')} on."
-        else:
-            description = f"A key moment in the game: {event_type}."
-
-        return description
+        return render_description(event)
 
     def get_commentary(self, event: dict, user_taste_profile: dict) -> str:
         """
         Generates commentary text by first creating a prompt and then calling the LLM.
         """
         prompt = self.generate_prompt(event, user_taste_profile)
-        commentary_text = self.openai_client.generate_commentary(prompt)
-        return commentary_text
\ No newline at end of file
+        if self.cache is None:
+            with metrics.LLM_CALL_SECONDS.time(mode="single"):
+                return self.openai_client.generate_commentary(prompt)
+
+        cache_key = self.cache.make_key(prompt, self.model_id)
+        commentary_text = self.cache.get(cache_key)
+        if commentary_text is None:
+            with metrics.LLM_CALL_SECONDS.time(mode="single"):
+                commentary_text = self.openai_client.generate_commentary(prompt)
+            if commentary_text not in LLM_FALLBACK_RESPONSES:
+                self.cache.put(cache_key, commentary_text)
+        return commentary_text
+
+    def get_commentary_batch(self, event: dict, user_taste_profiles: dict) -> dict:
+        """
+        Generates commentary for several styles of the same event with a single LLM call.
+        `user_taste_profiles` maps style name -> taste profile; returns style name -> text.
+        Cached styles are skipped, each parsed variant is cached under its own
+        single-style prompt, and any style the batch response doesn't cover
+        falls back to a per-style get_commentary call.
+        """
+        results = {}
+        missing = {}
+        for style, user_taste_profile in user_taste_profiles.items():
+            cached_text = None
+            if self.cache is not None:
+                cache_key = self.cache.make_key(self.generate_prompt(event, user_taste_profile), self.model_id)
+                cached_text = self.cache.get(cache_key)
+            if cached_text is not None:
+                results[style] = cached_text
+            else:
+                missing[style] = user_taste_profile
+
+        if len(missing) > 1:
+            prompt = self.generate_batch_prompt(event, missing)
+            with metrics.LLM_CALL_SECONDS.time(mode="batch"):
+                response_text = self.openai_client.generate_commentary(
+                    prompt, max_tokens=BATCH_MAX_TOKENS_PER_STYLE * len(missing)
+                )
+            parsed = {} if response_text in LLM_FALLBACK_RESPONSES else self.parse_batch_response(response_text, missing)
+            if len(parsed) < len(missing):
+                logger.info("Batch commentary covered %d of %d styles, falling back per style.", len(parsed), len(missing))
+            for style, commentary_text in parsed.items():
+                results[style] = commentary_text
+                if self.cache is not None:
+                    cache_key = self.cache.make_key(self.generate_prompt(event, missing[style]), self.model_id)
+                    self.cache.put(cache_key, commentary_text)
+            missing = {style: profile for style, profile in missing.items() if style not in parsed}
+
+        for style, user_taste_profile in missing.items():
+            results[style] = self.get_commentary(event, user_taste_profile)
+        return results
+
+    def stream_commentary(self, event: dict, user_taste_profile: dict):
+        """
+        Like get_commentary, but yields the text in chunks as the LLM produces them.
+        A cache hit is yielded as a single chunk; a streamed miss is cached once complete.
+        If the stream breaks part-way, the client's StreamInterrupted propagates and
+        nothing is cached, so the truncated text is never served as a finished line.
+        """
+        prompt = self.generate_prompt(event, user_taste_profile)
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(prompt, self.model_id)
+            cached_text = self.cache.get(cache_key)
+            if cached_text is not None:
+                yield cached_text
+                return
+
+        if not hasattr(self.openai_client, "generate_commentary_stream"):
+            chunks = [self.openai_client.generate_commentary(prompt)]
+        else:
+            chunks = self.openai_client.generate_commentary_stream(prompt)
+
+        parts = []
+        started = time.perf_counter()
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+
+        metrics.LLM_CALL_SECONDS.observe(time.perf_counter() - started, mode="stream")
+        commentary_text = "".join(parts)
+        if cache_key is not None and commentary_text not in LLM_FALLBACK_RESPONSES:
+            self.cache.put(cache_key, commentary_text)
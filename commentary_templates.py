@@ -0,0 +1,132 @@
+# commentary_templates.py
+
+# Deterministic commentary lines per event and taste style.
+# The "balanced" line doubles as the event description in LLM prompts, so
+# changing it also changes the prompts (and their cache keys).
+# Shots are split into "goal" and "shot_missed" by their outcome; event
+# types without an entry use "_default".
+EVENT_TEMPLATES = {
+    "kick_off": {
+        "balanced": "The game kicks off! The score is {score}.",
+        "analytical": "Kick-off. Both sides start level at {score}; the opening shape will tell us a lot.",
+        "emotional": "Here we go! The whistle blows and the game is under way at {score}!",
+        "humorous": "And they're off! {score} on the board and everyone still has clean kits.",
+    },
+    "goal": {
+        "balanced": "{player} of {team} scores a magnificent goal! The score is now {score}.{shot_type_sentence}",
+        "analytical": "Goal for {team}, finished by {player}. That makes it {score}.{shot_type_sentence}",
+        "emotional": "GOAL! {player} does it for {team}! It's {score}!{shot_type_sentence}",
+        "humorous": "{player} says thank you very much and {team} lead the party. {score}!{shot_type_sentence}",
+    },
+    "shot_missed": {
+        "balanced": "{player} of {team} takes a shot, but it's missed or saved! The score remains {score}.",
+        "analytical": "Attempt from {player} for {team}, no reward this time. Still {score}.",
+        "emotional": "So close from {player}! {team} were inches away, it stays {score}!",
+        "humorous": "{player} tries their luck for {team}. The ball had other plans. Still {score}.",
+    },
+    "foul": {
+        "balanced": "A foul committed by {player} of {team} on {fouled_player}.{card_sentence}",
+        "analytical": "Foul by {player} ({team}) on {fouled_player}.{card_sentence}",
+        "emotional": "Oh, that's a nasty one from {player} on {fouled_player}!{card_sentence}",
+        "humorous": "{player} of {team} mistakes {fouled_player} for the ball.{card_sentence}",
+    },
+    "possession_change": {
+        "balanced": "Possession changes hands, now with {team}.",
+        "analytical": "Turnover: {team} now in possession.",
+        "emotional": "{team} win it back and they're on the move!",
+        "humorous": "The ball switches sides; {team} are looking after it for now.",
+    },
+    "halftime": {
+        "balanced": "It's halftime! The score is {score}.",
+        "analytical": "Half-time, {score}. Plenty for both managers to work on.",
+        "emotional": "The whistle goes for half-time with the score at {score}. What a half!",
+        "humorous": "Half-time at {score}. Orange slices all round.",
+    },
+    "end_game": {
+        "balanced": "The game has ended! The final score is {score}.",
+        "analytical": "Full-time. The final score is {score}.",
+        "emotional": "It's all over! The final whistle goes at {score}!",
+        "humorous": "That's all, folks! {score} at the final whistle.",
+    },
+    "save": {
+        "balanced": "Incredible save by the {team} goalkeeper against a shot from {player}! The score remains {score}.",
+        "analytical": "Good stop from the {team} goalkeeper to deny {player}. Still {score}.",
+        "emotional": "What a save! The {team} keeper denies {player}! It stays {score}!",
+        "humorous": "{player} shoots, the {team} keeper says not today. Still {score}.",
+    },
+    "penalty": {
+        "balanced": "Penalty awarded to {team}! {player} steps up to take it.",
+        "analytical": "Penalty to {team}. {player} is the designated taker.",
+        "emotional": "Penalty for {team}! {player} steps up, the tension is unbearable!",
+        "humorous": "Penalty to {team}! {player} steps up, and the goalkeeper suddenly finds the goal very wide.",
+    },
+    "corner": {
+        "balanced": "Corner kick for {team}.",
+        "analytical": "Corner to {team}, a chance to test the set-piece routines.",
+        "emotional": "Corner for {team}! Everyone into the box!",
+        "humorous": "Corner to {team}. Cue the shirt-pulling contest.",
+    },
+    "substitution": {
+        "balanced": "Substitution for {team}: {player_out} off, {player_in} on.",
+        "analytical": "Change for {team}: {player_in} replaces {player_out}.",
+        "emotional": "{player_out} makes way for {team}, and on comes {player_in}!",
+        "humorous": "{player_out} is off for a sit down; {player_in} gets a go for {team}.",
+    },
+    "summary": {
+        "balanced": "A quick round-up of the recent play: {recent} The score is {score}.",
+        "analytical": "Recent play in brief: {recent} Score: {score}.",
+        "emotional": "Plenty happening out there! {recent} It's {score}.",
+        "humorous": "Blink and you missed it: {recent} Still {score}.",
+    },
+    "_default": {
+        "balanced": "A key moment in the game: {event_type}.",
+    },
+}
+
+DESCRIPTION_STYLE = "balanced"
+
+# Compiled once at import: (template key, style) -> render function taking a field dict
+_COMPILED_TEMPLATES = {
+    (key, style): template.format_map
+    for key, styles in EVENT_TEMPLATES.items()
+    for style, template in styles.items()
+}
+
+
+def _template_key(event: dict) -> str:
+    event_type = event.get("event_type")
+    if event_type == "shot_on_goal":
+        return "goal" if event.get("outcome") == "scored" else "shot_missed"
+    return event_type if event_type in EVENT_TEMPLATES else "_default"
+
+
+def _template_fields(event: dict) -> dict:
+    metadata = event.get("metadata", {})
+    outcome = event.get("outcome")
+    fields = {
+        "event_type": event.get("event_type"),
+        "player": event.get("player"),
+        "team": event.get("team"),
+        "fouled_player": event.get("fouled_player"),
+        "score": event.get("score", "0-0"),
+        "player_out": metadata.get("player_out"),
+        "player_in": metadata.get("player_in"),
+        "shot_type_sentence": f" It was a brilliant {metadata['shot_type']} shot." if metadata.get("shot_type") else "",
+        "card_sentence": f" The referee issues a {outcome.replace('_', ' ')}." if outcome else "",
+        "recent": "",
+    }
+    if fields["event_type"] == "summary":
+        fields["recent"] = " ".join(render_description(sub_event) for sub_event in event.get("events", []))
+    return fields
+
+
+def render_commentary(event: dict, style: str) -> str:
+    """Renders the template line for an event in the given style, falling back to the balanced line."""
+    key = _template_key(event)
+    render = _COMPILED_TEMPLATES.get((key, style)) or _COMPILED_TEMPLATES[(key, DESCRIPTION_STYLE)]
+    return render(_template_fields(event))
+
+
+def render_description(event: dict) -> str:
+    """Renders the neutral event description used in LLM prompts."""
+    return render_commentary(event, DESCRIPTION_STYLE)
@@ -0,0 +1,54 @@
+# conftest.py
+#
+# Fixtures shared by the test modules: a broadcaster on a small generation
+# pool of its own, and helpers to read back what its subscribers were sent.
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+
+import pytest
+
+from broadcaster import MatchBroadcaster
+
+
+@pytest.fixture
+def goal_event() -> dict:
+    return {"time": 10, "event_type": "shot_on_goal", "player": "Ronaldo", "team": "Al Nassr", "outcome": "scored"}
+
+
+@pytest.fixture
+def generation_pool():
+    pool = ThreadPoolExecutor(max_workers=2)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def make_broadcaster(generation_pool):
+    """Returns a factory for broadcasters of an empty match, generating on `generation_pool`."""
+    def make(commentary_generator=None, **options) -> MatchBroadcaster:
+        return MatchBroadcaster("test", [], commentary_generator, generation_pool, **options)
+    return make
+
+
+@pytest.fixture
+def drain(generation_pool):
+    """
+    Returns a function that waits for all generation on `generation_pool` to
+    finish, then takes every frame queued for a subscriber.
+    """
+    def drain(subscriber) -> list:
+        generation_pool.shutdown()
+        frames = []
+        while not subscriber.queue.empty():
+            frames.append(subscriber.queue.get_nowait())
+        return frames
+    return drain
+
+
+@pytest.fixture
+def frame_data():
+    """Returns a function that decodes the JSON payload of an SSE frame."""
+    def frame_data(frame: str) -> dict:
+        return json.loads(next(line for line in frame.splitlines() if line.startswith("data: "))[len("data: "):])
+    return frame_data
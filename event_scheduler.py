@@ -0,0 +1,131 @@
+# event_scheduler.py
+
+import logging
+import threading
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Event priorities; higher-priority (lower value) events get longer deadlines and are never dropped
+PRIORITY_HIGH = 0
+PRIORITY_MEDIUM = 1
+PRIORITY_LOW = 2
+
+EVENT_PRIORITIES = {
+    "kick_off": PRIORITY_HIGH,
+    "shot_on_goal": PRIORITY_HIGH,
+    "penalty": PRIORITY_HIGH,
+    "halftime": PRIORITY_HIGH,
+    "end_game": PRIORITY_HIGH,
+    "foul": PRIORITY_MEDIUM,
+    "save": PRIORITY_MEDIUM,
+    "substitution": PRIORITY_MEDIUM,
+    "possession_change": PRIORITY_LOW,
+    "corner": PRIORITY_LOW,
+}
+
+# How long after its scheduled time an event is still worth commenting on
+DEADLINE_SECONDS = {
+    PRIORITY_HIGH: 30.0,
+    PRIORITY_MEDIUM: 15.0,
+    PRIORITY_LOW: 5.0,
+}
+
+
+def event_priority(event: dict) -> int:
+    return EVENT_PRIORITIES.get(event.get("event_type"), PRIORITY_MEDIUM)
+
+
+def is_coalesced(event: dict) -> bool:
+    """True for a summary event built by coalesce_events, which has no commentary of its own yet."""
+    return event.get("event_type") == "summary" and "events" in event
+
+
+def coalesce_events(events: list) -> dict:
+    """Merges several events into one 'summary' event described in a single prompt."""
+    last = events[-1]
+    return {
+        "time": last.get("time"),
+        "sport": last.get("sport"),
+        "event_type": "summary",
+        "score": last.get("score"),
+        "events": events,
+    }
+
+
+class DeadlineScheduler:
+    """
+    Decides what to emit when several events are already due at once (a backlog,
+    usually because LLM latency exceeded the gap between events).
+    Events keep their match order. High-priority events are never dropped.
+    Medium and low events past their deadline are dropped, and consecutive
+    low-priority events that are still in time are coalesced into one summary
+    event; any other event, dropped or not, ends the run.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.dropped = 0
+        self.coalesced = 0
+        self.late = 0
+
+    def plan(self, due: list, now: float):
+        """
+        `due` is a list of (index, event, scheduled_at) in match order.
+        Returns (work, discarded_indices): the items to emit in match order, and the
+        indices of events that were dropped or merged into a summary.
+        A summary is emitted under the index of the last event it merges. That
+        index is discarded too, so commentary prefetched for the single event
+        isn't published as the summary's.
+        """
+        if len(due) < 2:
+            return due, []
+
+        work, discarded = [], []
+        low_run = []
+        dropped = coalesced = late = 0
+
+        def flush_low_run():
+            nonlocal coalesced
+            if len(low_run) == 1:
+                work.append(low_run[0])
+            elif low_run:
+                # Emit under the last merged event's index, with its own freshly generated commentary
+                merged = coalesce_events([event for _, event, _ in low_run])
+                work.append((low_run[-1][0], merged, low_run[0][2]))
+                discarded.extend(index for index, _, _ in low_run)
+                coalesced += len(low_run)
+            low_run.clear()
+
+        for index, event, scheduled_at in due:
+            priority = event_priority(event)
+            past_deadline = now - scheduled_at > DEADLINE_SECONDS[priority]
+            if priority == PRIORITY_LOW and not past_deadline:
+                low_run.append((index, event, scheduled_at))
+                continue
+            flush_low_run()
+            if priority == PRIORITY_HIGH:
+                work.append((index, event, scheduled_at))
+                if past_deadline:
+                    late += 1
+            elif past_deadline:
+                discarded.append(index)
+                dropped += 1
+            else:
+                work.append((index, event, scheduled_at))
+        flush_low_run()
+
+        with self._lock:
+            self.dropped += dropped
+            self.coalesced += coalesced
+            self.late += late
+        for reason, count in (("dropped", dropped), ("coalesced", coalesced), ("late", late)):
+            if count:
+                metrics.SCHEDULER_EVENTS.inc(count, reason=reason)
+        if dropped or coalesced:
+            logger.info("Backlog of %d events: dropped %d, coalesced %d", len(due), dropped, coalesced)
+        return work, discarded
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"dropped": self.dropped, "coalesced": self.coalesced, "late": self.late}
@@ -0,0 +1,120 @@
+# event_sources.py
+
+from abc import ABC, abstractmethod
+import json
+import logging
+import math
+import re
+import socket
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Replay speed value meaning "don't wait between events at all"
+AS_FAST_AS_POSSIBLE = 0.0
+
+
+def parse_replay_speed(value: str) -> float:
+    """
+    Parses a replay speed like "1", "10" or "max" into a multiplier.
+    Returns AS_FAST_AS_POSSIBLE for "max"/"asap"/"0". Raises ValueError for anything else invalid.
+    """
+    if value is None or value == "":
+        return 1.0
+    if value.lower() in ("max", "asap", "0"):
+        return AS_FAST_AS_POSSIBLE
+    speed = float(value)
+    # float() also accepts "nan" and "inf", which would make every event time meaningless
+    if not math.isfinite(speed) or speed <= 0:
+        raise ValueError(f"Replay speed must be a positive number, got {value!r}")
+    return speed
+
+
+def is_valid_match_id(match_id: str) -> bool:
+    """Match ids become file names (event files, bundles), so only plain names are allowed."""
+    return re.fullmatch(r"[\w-]+", match_id) is not None
+
+
+def _parse_lines(lines, label: str):
+    """Yields one event dict per non-empty JSON line, skipping lines that don't parse."""
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError as e:
+            logger.warning("Skipping malformed event on line %d of %s: %s", line_number, label, e)
+            continue
+        if not isinstance(event, dict) or "event_type" not in event:
+            logger.warning("Skipping event without event_type on line %d of %s", line_number, label)
+            continue
+        event.setdefault("time", 0)
+        yield event
+
+
+class EventSource(ABC):
+    """
+    An iterable of match events (dicts with at least 'time' and 'event_type').
+    Replay sources can be paced and read ahead; `live` sources deliver events
+    as they happen and must not be read ahead of time.
+    """
+    live = False
+
+    @abstractmethod
+    def __iter__(self):
+        """Yields event dicts in match order."""
+
+
+class ListEventSource(EventSource):
+    """Events already held in memory, such as the demo GAME_EVENTS."""
+    def __init__(self, events: list):
+        self.events = events
+
+    def __iter__(self):
+        return iter(self.events)
+
+
+class JSONLEventSource(EventSource):
+    """
+    Reads events lazily from a JSON Lines file, one event per line,
+    so long matches never need to be loaded whole.
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    def __iter__(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            yield from _parse_lines(f, self.path)
+
+
+class StdinEventSource(EventSource):
+    """Live events as JSON lines on a text stream (standard input by default)."""
+    live = True
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdin
+
+    def __iter__(self):
+        return _parse_lines(self.stream, "stdin")
+
+
+class TCPEventSource(EventSource):
+    """
+    Live events as JSON lines from a local TCP feed.
+    The connection is opened when iteration starts and closed when it ends.
+    """
+    live = True
+
+    def __init__(self, host: str, port: int, connect_timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+
+    def __iter__(self):
+        label = f"{self.host}:{self.port}"
+        with socket.create_connection((self.host, self.port), timeout=self.connect_timeout) as conn:
+            # Live feeds may be quiet for a long time between events
+            conn.settimeout(None)
+            with conn.makefile("r", encoding="utf-8") as lines:
+                yield from _parse_lines(lines, label)
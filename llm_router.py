@@ -0,0 +1,262 @@
+# llm_router.py
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import contextvars
+import logging
+import threading
+import time
+
+from api_clients import LLM_FALLBACK_RESPONSES, NO_COMMENTARY_MESSAGE, StreamInterrupted
+from lookahead import generation_workers, live_workers
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Total time a live event may wait for commentary across both providers
+DEFAULT_LATENCY_BUDGET_SECONDS = 4.0
+# Fire the hedged request once the primary is slower than this percentile of its recent latencies
+DEFAULT_HEDGE_PERCENTILE = 95
+# Hedge delay used until the primary has enough latency samples
+DEFAULT_HEDGE_DELAY_SECONDS = 1.5
+MIN_HEDGE_DELAY_SECONDS = 0.2
+LATENCY_WINDOW_SIZE = 200
+# Consecutive failures that open a provider's circuit, and how long it stays open
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_COOLDOWN_SECONDS = 30.0
+
+
+class ProviderStats:
+    """
+    Rolling latency window and circuit breaker for one LLM provider.
+    The circuit opens after CIRCUIT_FAILURE_THRESHOLD consecutive failures;
+    after the cooldown one trial request is let through (half-open), and its
+    outcome closes or re-opens the circuit.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies = deque(maxlen=LATENCY_WINDOW_SIZE)
+        self.successes = 0
+        self.failures = 0
+        self.hedges_won = 0
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.time() - self.opened_at < CIRCUIT_COOLDOWN_SECONDS or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def cancel_trial(self):
+        """Gives back a half-open trial that was allowed but never sent."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record(self, ok: bool, latency: float):
+        with self._lock:
+            self._trial_in_flight = False
+            if ok:
+                self.successes += 1
+                self.latencies.append(latency)
+                self.consecutive_failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                self.consecutive_failures += 1
+                if self.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD:
+                    if self.opened_at is None:
+                        logger.warning("Circuit opened for LLM provider %s", self.name)
+                        metrics.ERRORS.inc(component="llm_circuit_open")
+                    self.opened_at = time.time()
+
+    def percentile(self, pct: float):
+        """Returns the given latency percentile in seconds, or None without samples."""
+        with self._lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> dict:
+        return {
+            "circuit": "open" if self.opened_at is not None else "closed",
+            "p50_seconds": self.percentile(50),
+            "p95_seconds": self.percentile(95),
+            "successes": self.successes,
+            "failures": self.failures,
+            "hedges_won": self.hedges_won,
+        }
+
+
+class LLMRouter:
+    """
+    Sends commentary requests to a primary LLM client and hedges with a secondary one.
+    If the primary hasn't answered within its recent `hedge_percentile` latency,
+    the same prompt is sent to the secondary and whichever answers first wins;
+    if the primary fails outright, the secondary is tried immediately. A provider
+    with an open circuit is skipped. Has the same interface as the clients.
+    Calls run on the router's own pool, by default two threads per generation
+    worker, live or prefetch (a primary and its hedge), so it never caps
+    concurrency below the generation pools. The hedge delay and latency budget start when the primary
+    call actually starts, not while it waits for a thread.
+    """
+    def __init__(self, primary, secondary, latency_budget_seconds: float = DEFAULT_LATENCY_BUDGET_SECONDS,
+                 hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE, max_workers: int = None):
+        self.primary = primary
+        self.secondary = secondary
+        self.latency_budget_seconds = latency_budget_seconds
+        self.hedge_percentile = hedge_percentile
+        self.model_name = "+".join(
+            getattr(client, "model_name", type(client).__name__) for client in (primary, secondary)
+        )
+        self.provider_stats = {
+            id(primary): ProviderStats(getattr(primary, "model_name", "primary")),
+            id(secondary): ProviderStats(getattr(secondary, "model_name", "secondary")),
+        }
+        if max_workers is None:
+            max_workers = 2 * (generation_workers() + live_workers())
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-router")
+
+    def _stats(self, client) -> ProviderStats:
+        return self.provider_stats[id(client)]
+
+    def _call(self, client, prompt: str, max_tokens: int = None):
+        """Runs one provider call and records its outcome. Returns (ok, text)."""
+        started = time.time()
+        if max_tokens:
+            text = client.generate_commentary(prompt, max_tokens=max_tokens)
+        else:
+            text = client.generate_commentary(prompt)
+        ok = bool(text) and text not in LLM_FALLBACK_RESPONSES
+        self._stats(client).record(ok, time.time() - started)
+        return ok, text
+
+    def _submit(self, client, prompt: str, max_tokens: int = None):
+        """Queues one provider call. Returns (future, started), where `started` is set once a thread picks it up."""
+        # Carry the caller's context over so the call keeps its outbound priority
+        context = contextvars.copy_context()
+        started = threading.Event()
+
+        def run():
+            started.set()
+            return context.run(self._call, client, prompt, max_tokens)
+
+        return self._executor.submit(run), started
+
+    def _first_allowed(self):
+        """
+        Returns the first provider whose circuit lets a request through, or None.
+        allow_request() may claim a half-open trial, so it is only asked of the
+        provider about to be called, never of a backup that may go unused.
+        """
+        for client in (self.primary, self.secondary):
+            if self._stats(client).allow_request():
+                return client
+        return None
+
+    def _stream_candidates(self):
+        """Yields providers to stream from in order, asking each circuit only when it is about to be tried."""
+        allowed = False
+        for client in (self.primary, self.secondary):
+            if self._stats(client).allow_request():
+                allowed = True
+                yield client
+        if not allowed:
+            yield self.primary
+
+    def _hedge_delay(self) -> float:
+        delay = self._stats(self.primary).percentile(self.hedge_percentile)
+        if delay is None:
+            delay = DEFAULT_HEDGE_DELAY_SECONDS
+        return min(max(delay, MIN_HEDGE_DELAY_SECONDS), self.latency_budget_seconds)
+
+    def generate_commentary(self, prompt: str, max_tokens: int = None) -> str:
+        # With both circuits open, still give the primary a chance rather than failing outright
+        chosen = self._first_allowed() or self.primary
+        backup = self.secondary if chosen is self.primary else None
+
+        future, started = self._submit(chosen, prompt, max_tokens)
+        # Time spent waiting for a router thread counts against neither the hedge delay nor the budget
+        started.wait()
+        deadline = time.time() + self.latency_budget_seconds
+        pending = {future: chosen}
+        if backup is not None:
+            done, _ = wait(pending, timeout=self._hedge_delay())
+            first = next(iter(done), None)
+            if first is not None and first.result()[0]:
+                return first.result()[1]
+            if first is not None:
+                pending.pop(first)
+            if self._stats(backup).allow_request():
+                logger.info("Hedging LLM request to %s", self._stats(backup).name)
+                pending[self._submit(backup, prompt, max_tokens)[0]] = backup
+            else:
+                backup = None
+
+        last_text = None
+        while pending:
+            done, _ = wait(pending, timeout=max(0.0, deadline - time.time()), return_when=FIRST_COMPLETED)
+            if not done:
+                logger.warning("LLM latency budget exceeded")
+                metrics.ERRORS.inc(component="llm_budget_exceeded")
+                break
+            for future in done:
+                client = pending.pop(future)
+                ok, text = future.result()
+                if ok:
+                    if client is backup:
+                        self._stats(client).hedges_won += 1
+                    # The loser can't be interrupted mid-request; cancel it if it hasn't started
+                    for loser, loser_client in pending.items():
+                        if loser.cancel():
+                            self._stats(loser_client).cancel_trial()
+                    return text
+                last_text = text
+        return last_text or NO_COMMENTARY_MESSAGE
+
+    def generate_commentary_stream(self, prompt: str):
+        """
+        Streams from the first provider whose circuit is closed, failing over to
+        the other if it produces nothing but a placeholder. Streams are not hedged.
+        """
+        last_text = None
+        for client in self._stream_candidates():
+            if not hasattr(client, "generate_commentary_stream"):
+                ok, text = self._call(client, prompt)
+                if ok:
+                    yield text
+                    return
+                last_text = text
+                continue
+
+            started = time.time()
+            chunks = client.generate_commentary_stream(prompt)
+            first_chunk = next(chunks, None)
+            if first_chunk is None or first_chunk in LLM_FALLBACK_RESPONSES:
+                self._stats(client).record(False, time.time() - started)
+                last_text = first_chunk
+                continue
+            try:
+                yield first_chunk
+                yield from chunks
+            except GeneratorExit:
+                # The consumer stopped listening, so the outcome is unknown
+                self._stats(client).cancel_trial()
+                raise
+            except StreamInterrupted:
+                # Text was already yielded, so failing over would splice two different lines
+                self._stats(client).record(False, time.time() - started)
+                raise
+            self._stats(client).record(True, time.time() - started)
+            return
+        yield last_text or NO_COMMENTARY_MESSAGE
+
+    def stats(self) -> dict:
+        return {stats.name: stats.snapshot() for stats in self.provider_stats.values()}
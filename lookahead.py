@@ -0,0 +1,125 @@
+# lookahead.py
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import os
+import threading
+
+from outbound_governor import PRIORITY_LIVE, PRIORITY_PREFETCH, run_with_priority
+
+# How many upcoming events get their commentary generated ahead of time
+DEFAULT_LOOKAHEAD_EVENTS = 3
+# Size of the worker pool shared by all matches for commentary generation (GENERATION_WORKERS).
+# Each worker holds one LLM call or stream at a time, so the process can generate
+# at most workers / LLM latency lines per second across every match: 8 workers at
+# 2 s per call is 4 lines/s, and matches fall behind once their styles need more.
+DEFAULT_PREFETCH_WORKERS = 8
+# Size of the separate pool for generation a viewer is already waiting on (LIVE_GENERATION_WORKERS).
+# Prefetch tasks queued in the governor hold their workers, so live work
+# needs threads of its own to reach the governor's priority queue at all.
+DEFAULT_LIVE_WORKERS = 8
+
+
+def generation_workers() -> int:
+    """Configured size of the generation pool: GENERATION_WORKERS, else the default."""
+    return int(os.getenv("GENERATION_WORKERS", DEFAULT_PREFETCH_WORKERS))
+
+
+def live_workers() -> int:
+    """Configured size of the live generation pool: LIVE_GENERATION_WORKERS, else the default."""
+    return int(os.getenv("LIVE_GENERATION_WORKERS", DEFAULT_LIVE_WORKERS))
+
+
+def _create_pool(max_workers: int, thread_name_prefix: str) -> ThreadPoolExecutor:
+    if max_workers < 1:
+        raise ValueError(f"Generation pool needs at least one worker, got {max_workers}")
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+
+
+def create_prefetch_executor(max_workers: int = None) -> ThreadPoolExecutor:
+    """Builds the generation pool, sized by `max_workers`, else GENERATION_WORKERS, else the default."""
+    return _create_pool(max_workers or generation_workers(), "commentary-prefetch")
+
+
+def create_live_executor(max_workers: int = None) -> ThreadPoolExecutor:
+    """Builds the live generation pool, sized by `max_workers`, else LIVE_GENERATION_WORKERS, else the default."""
+    return _create_pool(max_workers or live_workers(), "commentary-live")
+
+
+def _split_batch(batch_future: Future, styles) -> dict:
+    """Returns one Future per style, resolved from a batch future's {style: text} result."""
+    style_futures = {style: Future() for style in styles}
+
+    def resolve(done: Future):
+        try:
+            results = done.result()
+        except BaseException as e:
+            for future in style_futures.values():
+                if not future.cancelled():
+                    future.set_exception(e)
+            return
+        for style, future in style_futures.items():
+            if not future.cancelled():
+                future.set_result(results[style])
+
+    batch_future.add_done_callback(resolve)
+    return style_futures
+
+
+class CommentaryPrefetcher:
+    """
+    Starts commentary generation for events before they are due, so the
+    LLM round-trip overlaps with the wait instead of delaying the emit.
+    Results are keyed by (event index, taste style). With `batch_styles`, all
+    styles requested together for an event share a single LLM call.
+    Prefetch calls run at prefetch priority, so live requests go ahead of them.
+    Generation requested with `live=True` (a viewer is already waiting) runs at
+    live priority on `live_executor`, so it never queues behind prefetch tasks.
+    """
+    def __init__(self, commentary_generator, executor: ThreadPoolExecutor, batch_styles: bool = True,
+                 live_executor: ThreadPoolExecutor = None):
+        self.commentary_generator = commentary_generator
+        self.executor = executor
+        self.live_executor = live_executor or executor
+        self.batch_styles = batch_styles
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def prefetch(self, index: int, event: dict, profiles: dict, live: bool = False):
+        """Submits generation for every style in `profiles` that isn't already in flight."""
+        executor, priority = (self.live_executor, PRIORITY_LIVE) if live else (self.executor, PRIORITY_PREFETCH)
+        with self._lock:
+            missing = {style: profile for style, profile in profiles.items() if (index, style) not in self._futures}
+            if self.batch_styles and len(missing) > 1:
+                batch = executor.submit(
+                    run_with_priority, priority, self.commentary_generator.get_commentary_batch, event, missing
+                )
+                for style, future in _split_batch(batch, missing).items():
+                    self._futures[(index, style)] = future
+                return
+            for style, profile in missing.items():
+                self._futures[(index, style)] = executor.submit(
+                    run_with_priority, priority, self.commentary_generator.get_commentary, event, profile
+                )
+
+    def has(self, index: int, style: str) -> bool:
+        """Returns True if commentary for this event and style was already requested."""
+        with self._lock:
+            return (index, style) in self._futures
+
+    def ready(self, index: int, style: str) -> bool:
+        """Returns True if commentary for this event and style has already finished generating."""
+        with self._lock:
+            future = self._futures.get((index, style))
+        return future is not None and future.done()
+
+    def take(self, index: int, style: str) -> Future:
+        """Hands over the future for this event and style without waiting on it, or None if it was never requested."""
+        with self._lock:
+            return self._futures.pop((index, style), None)
+
+    def discard(self, index: int = None):
+        """Drops pending results for one event, or for all events if index is None."""
+        with self._lock:
+            keys = [key for key in self._futures if index is None or key[0] == index]
+            for key in keys:
+                self._futures.pop(key).cancel()
@@ -0,0 +1,73 @@
+# match_clock.py
+
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Threads that run due match steps (emits and read-ahead) for all matches together
+DEFAULT_DISPATCH_WORKERS = 16
+
+
+class MatchClock:
+    """
+    Owns the event clocks of every running match.
+    Timers sit in one heap ordered by due time and a single timer thread waits
+    for the earliest one; when a timer falls due its callback is handed to a
+    bounded dispatch pool. The timer thread never runs callbacks itself, so one
+    slow emit can't delay another match's events, and the number of threads
+    stays fixed no matter how many matches are running.
+    """
+    def __init__(self, max_workers: int = DEFAULT_DISPATCH_WORKERS):
+        self._heap = []  # (due time, tie-breaker, callback, args)
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._dispatch = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="match-dispatch")
+        self._thread = None
+
+    def call_at(self, when: float, callback, *args):
+        """Runs `callback(*args)` on the dispatch pool at wall-clock time `when` (time.time())."""
+        # A NaN due time never compares as due and would stall every timer queued behind it
+        if not math.isfinite(when):
+            raise ValueError(f"Timer due time must be finite, got {when!r}")
+        with self._condition:
+            heapq.heappush(self._heap, (when, next(self._counter), callback, args))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="match-clock", daemon=True)
+                self._thread.start()
+            # Wake the timer thread in case this timer is now the earliest
+            self._condition.notify()
+
+    def call_soon(self, callback, *args):
+        self.call_at(time.time(), callback, *args)
+
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._heap)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if not self._heap:
+                        self._condition.wait()
+                        continue
+                    delay = self._heap[0][0] - time.time()
+                    if delay <= 0:
+                        break
+                    self._condition.wait(delay)
+                when, _, callback, args = heapq.heappop(self._heap)
+            metrics.CLOCK_DISPATCH_DELAY_SECONDS.observe(max(0.0, time.time() - when))
+            try:
+                self._dispatch.submit(callback, *args)
+            except RuntimeError as e:
+                # Interpreter shutdown; nothing left to run timers for
+                logger.debug("Match clock stopped: %s", e)
+                return
@@ -0,0 +1,182 @@
+# metrics.py
+#
+# Minimal in-process metrics with Prometheus text exposition, served on /metrics.
+# Metrics are process-wide; with several worker processes each one reports its own.
+
+from contextlib import contextmanager
+import threading
+import time
+
+# Latency buckets in seconds, from sub-millisecond template emits to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_key: tuple, extra: tuple = ()) -> str:
+    pairs = label_key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, registry=None):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _samples(self) -> list:
+        """Returns (suffix, label key, extra labels, value) tuples for exposition."""
+        with self._lock:
+            return [("", key, (), value) for key, value in self._values.items()]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(key, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """A monotonically increasing count, optionally split by labels."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+
+class Gauge(Metric):
+    """A value that can go up and down, such as the number of open streams."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+
+class Histogram(Metric):
+    """Observed durations (or sizes) counted into cumulative buckets, with a running sum."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: tuple = DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        super().__init__(name, documentation, registry)
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[position] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the wall-clock duration of the `with` block, even if it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> list:
+        samples = []
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append(("_bucket", key, (("le", _format_value(bound)),), cumulative))
+            samples.append(("_sum", key, (), total))
+            samples.append(("_count", key, (), cumulative))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        """Returns every registered metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# --- Per-stage timings ---
+PROMPT_BUILD_SECONDS = Histogram("sportsync_prompt_build_seconds", "Time to build an LLM prompt.")
+LLM_CALL_SECONDS = Histogram("sportsync_llm_call_seconds", "Time for an LLM call to return its full text, by mode.")
+TTS_SYNTHESIS_SECONDS = Histogram("sportsync_tts_synthesis_seconds", "Time to synthesize one uncached commentary line.")
+QLOO_LOOKUP_SECONDS = Histogram("sportsync_qloo_lookup_seconds", "Time for one Qloo taste profile lookup.")
+SSE_WRITE_SECONDS = Histogram("sportsync_sse_write_seconds", "Time for the server to write one SSE frame to a client.")
+EMIT_LATENESS_SECONDS = Histogram("sportsync_emit_lateness_seconds", "Time between an event's scheduled time and its emit.")
+CLOCK_DISPATCH_DELAY_SECONDS = Histogram(
+    "sportsync_clock_dispatch_delay_seconds", "Time between a match timer's due time and its hand-off to the dispatch pool."
+)
+GOVERNOR_QUEUE_WAIT_SECONDS = Histogram(
+    "sportsync_governor_queue_wait_seconds", "Time an outbound call waited for a slot, by provider and priority."
+)
+
+# --- Counters ---
+CACHE_LOOKUPS = Counter("sportsync_cache_lookups_total", "Cache lookups by cache and result (hit, disk_hit, stale, miss, in_flight).")
+ERRORS = Counter("sportsync_errors_total", "Errors by component.")
+SSE_FRAMES = Counter("sportsync_sse_frames_total", "SSE frames written to clients.")
+RATE_LIMITED = Counter("sportsync_rate_limited_total", "Outbound calls answered with HTTP 429, by provider.")
+GOVERNOR_REJECTED = Counter(
+    "sportsync_governor_rejected_total", "Outbound calls turned away by a full provider queue, by provider and priority."
+)
+SCHEDULER_EVENTS = Counter(
+    "sportsync_scheduler_events_total", "Backlogged events the deadline scheduler handled, by reason (dropped, coalesced, late)."
+)
+STREAM_RESUMES = Counter("sportsync_stream_resumes_total", "Reconnecting SSE clients resumed from their Last-Event-ID.")
+
+# --- Gauges ---
+OPEN_STREAMS = Gauge("sportsync_open_streams", "Currently open commentary SSE streams.")
+GOVERNOR_CONCURRENCY_LIMIT = Gauge("sportsync_governor_concurrency_limit", "Current adaptive concurrency limit, by provider.")
+RUNNING_MATCHES = Gauge("sportsync_running_matches", "Matches currently being broadcast.")
@@ -0,0 +1,341 @@
+# outbound_governor.py
+#
+# Limits calls to external providers (LLMs, Qloo, ElevenLabs) so that load turns
+# into queueing instead of 429 storms. Each provider gets one governor:
+#   - a token bucket for its requests-per-minute and tokens-per-minute quotas
+#   - an AIMD concurrency limit that grows while calls are fast and succeed, and
+#     shrinks on 429s or when latency climbs well above its baseline
+#   - a bounded priority queue, so live commentary goes ahead of prefetch and bake work
+#
+# Limits come from the environment, e.g. OPENAI_RPM=3500, OPENAI_TPM=90000,
+# OPENAI_MAX_CONCURRENCY=32. Unset quotas are not enforced.
+
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Call priorities; lower runs first
+PRIORITY_LIVE = 0
+PRIORITY_PREFETCH = 1
+PRIORITY_BAKE = 2
+PRIORITY_NAMES = {PRIORITY_LIVE: "live", PRIORITY_PREFETCH: "prefetch", PRIORITY_BAKE: "bake"}
+
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_INITIAL_CONCURRENCY = 4
+# Calls that may wait for a slot; beyond this the lowest-priority waiter is turned away
+DEFAULT_MAX_QUEUE = 64
+# A call slower than this multiple of the provider's baseline latency counts as congestion
+LATENCY_TOLERANCE = 2.0
+# Multiplicative decreases for a 429 and for a congested call
+RATE_LIMITED_BACKOFF = 0.5
+CONGESTION_BACKOFF = 0.9
+# Minimum time between two decreases, so one burst of failures only halves the limit once
+DECREASE_COOLDOWN_SECONDS = 1.0
+# Pause applied after a 429 that carries no Retry-After header
+DEFAULT_RETRY_AFTER_SECONDS = 1.0
+
+_call_priority = contextvars.ContextVar("outbound_call_priority", default=PRIORITY_LIVE)
+
+
+@contextmanager
+def call_priority(priority: int):
+    """Runs outbound calls made inside the block (on this thread or task) at `priority`."""
+    token = _call_priority.set(priority)
+    try:
+        yield
+    finally:
+        _call_priority.reset(token)
+
+
+def run_with_priority(priority: int, fn, *args, **kwargs):
+    """Calls `fn` at `priority`; handy as an executor.submit target."""
+    with call_priority(priority):
+        return fn(*args, **kwargs)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for quota accounting (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """True for a provider's 429 response, whichever SDK or HTTP library raised it."""
+    for status in (
+        getattr(error, "status_code", None),
+        getattr(error, "code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+    ):
+        if status == 429:
+            return True
+    return False
+
+
+def _retry_after(error: BaseException) -> float:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER_SECONDS
+
+
+class GovernorOverloaded(Exception):
+    """Raised when a call is turned away because the provider's wait queue is full."""
+
+
+class TokenBucket:
+    """Refills at `per_minute` / 60 per second up to one minute's worth. Not thread-safe on its own."""
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+
+class _Ticket:
+    __slots__ = ("priority", "tokens", "state", "enqueued")
+
+    def __init__(self, priority: int, tokens: int):
+        self.priority = priority
+        self.tokens = tokens
+        self.state = "waiting"  # -> granted, rejected or abandoned
+        self.enqueued = time.monotonic()
+
+
+class ProviderGovernor:
+    """
+    Admission control for one provider. Wrap every call in `slot()` (or
+    `async_slot()`); it waits until the call fits in the concurrency limit and
+    the quotas, then records its latency and whether it was rate limited.
+    """
+    def __init__(self, name: str, rpm: float = None, tpm: float = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 initial_concurrency: int = DEFAULT_INITIAL_CONCURRENCY, min_concurrency: int = 1,
+                 max_queue: int = DEFAULT_MAX_QUEUE):
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(min(max(initial_concurrency, min_concurrency), max_concurrency))
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.rate_limited = 0
+        self.rejected = 0
+        self.baseline_latency = None
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._waiting = []  # heap of (priority, arrival order, ticket)
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        metrics.GOVERNOR_CONCURRENCY_LIMIT.set(self.limit, provider=name)
+
+    # --- Admission ---
+
+    def _grant_locked(self) -> float:
+        """
+        Grants waiting tickets in priority order while there is room.
+        Returns how long until the head of the queue could be granted (0 if nothing is blocked on time).
+        """
+        while self._waiting:
+            priority, _, ticket = self._waiting[0]
+            if ticket.state != "waiting":
+                heapq.heappop(self._waiting)
+                continue
+            if self.in_flight >= int(self.limit):
+                return 0.0
+            now = time.monotonic()
+            delay = max(
+                self._paused_until - now,
+                self.requests.wait_time(1, now) if self.requests else 0.0,
+                self.tokens.wait_time(ticket.tokens, now) if self.tokens else 0.0,
+            )
+            if delay > 0:
+                return delay
+            heapq.heappop(self._waiting)
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(ticket.tokens)
+            self.in_flight += 1
+            ticket.state = "granted"
+            metrics.GOVERNOR_QUEUE_WAIT_SECONDS.observe(
+                now - ticket.enqueued, provider=self.name, priority=PRIORITY_NAMES.get(priority, str(priority))
+            )
+            self._condition.notify_all()
+        return 0.0
+
+    def _enqueue(self, tokens: int) -> _Ticket:
+        priority = _call_priority.get()
+        ticket = _Ticket(priority, tokens)
+        with self._condition:
+            live = [entry for entry in self._waiting if entry[2].state == "waiting"]
+            if len(live) >= self.max_queue:
+                # Turn away whoever is least urgent: the newest of the lowest-priority waiters, or this call
+                victim = max(live, key=lambda entry: (entry[0], entry[1]))
+                if victim[0] <= priority:
+                    self._reject(ticket)
+                    return ticket
+                self._reject(victim[2])
+                self._condition.notify_all()
+            heapq.heappush(self._waiting, (priority, next(self._counter), ticket))
+            self._grant_locked()
+        return ticket
+
+    def _reject(self, ticket: _Ticket):
+        ticket.state = "rejected"
+        self.rejected += 1
+        metrics.GOVERNOR_REJECTED.inc(provider=self.name, priority=PRIORITY_NAMES.get(ticket.priority, str(ticket.priority)))
+
+    def _wait(self, ticket: _Ticket):
+        """Blocks until the ticket is granted or rejected."""
+        with self._condition:
+            while ticket.state == "waiting":
+                delay = self._grant_locked()
+                if ticket.state != "waiting":
+                    break
+                self._condition.wait(delay or None)
+        if ticket.state == "rejected":
+            raise GovernorOverloaded(f"{self.name} call queue is full")
+
+    def _abandon(self, ticket: _Ticket):
+        """Withdraws a ticket whose caller went away (e.g. a cancelled task), returning its slot if granted."""
+        with self._condition:
+            if ticket.state == "granted":
+                self.in_flight -= 1
+            ticket.state = "abandoned"
+            self._grant_locked()
+            self._condition.notify_all()
+
+    # --- Feedback ---
+
+    def _decrease_locked(self, factor: float, now: float):
+        if now - self._last_decrease < DECREASE_COOLDOWN_SECONDS:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_concurrency), self.limit * factor)
+
+    def _release(self, latency: float, error: BaseException = None):
+        now = time.monotonic()
+        with self._condition:
+            self.in_flight -= 1
+            if error is not None and is_rate_limited(error):
+                self.rate_limited += 1
+                metrics.RATE_LIMITED.inc(provider=self.name)
+                self._paused_until = max(self._paused_until, now + _retry_after(error))
+                self._decrease_locked(RATE_LIMITED_BACKOFF, now)
+                logger.warning("%s rate limited; concurrency limit now %d", self.name, int(self.limit))
+            elif error is None:
+                if self.baseline_latency is None or latency < self.baseline_latency:
+                    self.baseline_latency = latency
+                else:
+                    # Drift slowly upwards so the baseline follows a provider that got slower for good
+                    self.baseline_latency += (latency - self.baseline_latency) * 0.01
+                if latency > self.baseline_latency * LATENCY_TOLERANCE:
+                    self._decrease_locked(CONGESTION_BACKOFF, now)
+                else:
+                    self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            metrics.GOVERNOR_CONCURRENCY_LIMIT.set(self.limit, provider=self.name)
+            self._grant_locked()
+            self._condition.notify_all()
+
+    # --- Public API ---
+
+    @contextmanager
+    def slot(self, tokens: int = 1):
+        """
+        Holds one call slot for the duration of the block. Raises GovernorOverloaded
+        if the call was turned away. Exceptions raised in the block are fed back
+        (429s shrink the limit) and re-raised.
+        """
+        ticket = self._enqueue(tokens)
+        self._wait(ticket)
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            self._release(time.monotonic() - started, e)
+            raise
+        self._release(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def async_slot(self, tokens: int = 1):
+        """Async variant of slot(). Waiting happens in a worker thread only when the call can't start at once."""
+        ticket = self._enqueue(tokens)
+        if ticket.state == "waiting":
+            try:
+                await asyncio.to_thread(self._wait, ticket)
+            except asyncio.CancelledError:
+                self._abandon(ticket)
+                raise
+        elif ticket.state == "rejected":
+            raise GovernorOverloaded(f"{self.name} call queue is full")
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            self._release(time.monotonic() - started, e)
+            raise
+        self._release(time.monotonic() - started)
+
+    def snapshot(self) -> dict:
+        with self._condition:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "waiting": sum(1 for entry in self._waiting if entry[2].state == "waiting"),
+                "rate_limited": self.rate_limited,
+                "rejected": self.rejected,
+                "baseline_latency_seconds": self.baseline_latency,
+            }
+
+
+_governors = {}
+_governors_lock = threading.Lock()
+
+
+def _env_number(name: str, default=None):
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def governor_for(provider: str) -> ProviderGovernor:
+    """
+    Returns the process-wide governor for a provider, configured from
+    <PROVIDER>_RPM, <PROVIDER>_TPM and <PROVIDER>_MAX_CONCURRENCY.
+    """
+    with _governors_lock:
+        governor = _governors.get(provider)
+        if governor is None:
+            prefix = provider.upper()
+            governor = ProviderGovernor(
+                provider,
+                rpm=_env_number(f"{prefix}_RPM"),
+                tpm=_env_number(f"{prefix}_TPM"),
+                max_concurrency=int(_env_number(f"{prefix}_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+            )
+            _governors[provider] = governor
+        return governor
+
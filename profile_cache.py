@@ -0,0 +1,123 @@
+# profile_cache.py
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_TTL_SECONDS = 10 * 60
+# Stale profiles are still served (and refreshed in the background) for this long past their TTL
+DEFAULT_PROFILE_MAX_STALE_SECONDS = 24 * 60 * 60
+# Every browser session adds an entry, so the cache is bounded (least recently used go first)
+DEFAULT_PROFILE_MAX_ENTRIES = 10000
+
+
+class TasteProfileCache:
+    """
+    Caches taste profiles keyed by (user_id, preference_type).
+    Fresh entries are returned directly. Entries past their TTL are still
+    returned immediately while a background refresh fetches a new profile,
+    so only the very first lookup for a key waits on Qloo.
+    `loader` takes the Qloo user_data dict and returns a profile dict.
+    At most `max_entries` profiles are kept; the least recently used are
+    evicted first, and entries too old to serve are swept out on insert.
+    """
+    def __init__(self, loader, ttl_seconds: float = DEFAULT_PROFILE_TTL_SECONDS,
+                 max_stale_seconds: float = DEFAULT_PROFILE_MAX_STALE_SECONDS,
+                 max_entries: int = DEFAULT_PROFILE_MAX_ENTRIES):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (fetched_at, profile), least recently used first
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="profile-refresh")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(user_data: dict) -> tuple:
+        return (user_data.get("user_id"), user_data.get("preference_type", "balanced"))
+
+    def get_cached(self, user_data: dict):
+        """
+        Returns the cached profile without ever blocking on Qloo, or None on a miss.
+        A stale hit schedules a background refresh.
+        """
+        key = self._key(user_data)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                metrics.CACHE_LOOKUPS.inc(cache="profile", result="miss")
+                return None
+            fetched_at, profile = entry
+            age = time.time() - fetched_at
+            self._entries.move_to_end(key)
+            if age <= self.ttl_seconds:
+                self.hits += 1
+                metrics.CACHE_LOOKUPS.inc(cache="profile", result="hit")
+                return profile
+            if age > self.ttl_seconds + self.max_stale_seconds:
+                del self._entries[key]
+                self.misses += 1
+                metrics.CACHE_LOOKUPS.inc(cache="profile", result="miss")
+                return None
+            self.stale_hits += 1
+            metrics.CACHE_LOOKUPS.inc(cache="profile", result="stale")
+            if key not in self._refreshing:
+                self._refreshing.add(key)
+                self._executor.submit(self._refresh, key, dict(user_data))
+            return profile
+
+    def get(self, user_data: dict) -> dict:
+        """Returns the cached profile, loading it synchronously on a miss."""
+        profile = self.get_cached(user_data)
+        if profile is None:
+            profile = self.loader(user_data)
+            self.put(user_data, profile)
+        return profile
+
+    def put(self, user_data: dict, profile: dict):
+        with self._lock:
+            self._store_locked(self._key(user_data), profile)
+
+    def _store_locked(self, key: tuple, profile: dict):
+        now = time.time()
+        self._entries[key] = (now, profile)
+        self._entries.move_to_end(key)
+        expired_before = now - self.ttl_seconds - self.max_stale_seconds
+        # Entries too old to serve sit at the front unless they were looked up recently
+        while self._entries:
+            oldest_key, (fetched_at, _) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_entries and fetched_at >= expired_before:
+                break
+            del self._entries[oldest_key]
+
+    def _refresh(self, key: tuple, user_data: dict):
+        try:
+            profile = self.loader(user_data)
+            with self._lock:
+                self._store_locked(key, profile)
+        except Exception as e:
+            logger.error("Error refreshing taste profile for %s: %s", key, e)
+            metrics.ERRORS.inc(component="qloo")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,107 @@
+# providers.py
+#
+# Chooses the LLM and TTS backends from configuration and builds each client on
+# first use, so a process never imports SDKs or opens connections for backends
+# it doesn't use.
+#
+#   LLM_PROVIDER           gemini (default) or openai
+#   LLM_FALLBACK_PROVIDER  hedge/failover provider behind LLMRouter; defaults to
+#                          openai when OPENAI_API_KEY is set; "none" disables it
+#   TTS_PROVIDER           edge (default), gtts or elevenlabs
+
+import logging
+import os
+import threading
+
+from api_clients import EdgeTTSClient, ElevenLabsClient, GeminiClient, GTTSClient, OpenAIClient, QlooClient
+from llm_router import LLMRouter
+
+logger = logging.getLogger(__name__)
+
+LLM_PROVIDERS = {
+    "gemini": GeminiClient,
+    "openai": OpenAIClient,
+}
+TTS_PROVIDERS = {
+    "edge": EdgeTTSClient,
+    "gtts": GTTSClient,
+    "elevenlabs": ElevenLabsClient,
+}
+DEFAULT_LLM_PROVIDER = "gemini"
+DEFAULT_TTS_PROVIDER = "edge"
+# Environment variables a provider's client refuses to start without. They are
+# checked when the provider is chosen, so a bad config fails at startup rather
+# than on the first line of the first match.
+REQUIRED_ENV = {
+    "openai": "OPENAI_API_KEY",
+    "elevenlabs": "ELEVENLABS_API_KEY",
+}
+
+
+class LazyClient:
+    """
+    Stands in for a client until it is first used. The first attribute lookup
+    calls `factory` (once, even under concurrent first use) and every lookup
+    after that is forwarded to the real client.
+    """
+    def __init__(self, name: str, factory):
+        self.name = name
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    logger.info("Initializing %s client", self.name)
+                    self._client = self._factory()
+        return self._client
+
+    def __getattr__(self, attr):
+        # Only called for attributes not found on the proxy itself
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return getattr(self._get(), attr)
+
+    def __repr__(self) -> str:
+        state = "initialized" if self._client is not None else "not initialized"
+        return f"<LazyClient {self.name} ({state})>"
+
+
+def _choose(kind: str, providers: dict, name: str) -> str:
+    name = name.strip().lower()
+    if name not in providers:
+        raise ValueError(f"Unknown {kind} provider {name!r}; expected one of {', '.join(sorted(providers))}")
+    variable = REQUIRED_ENV.get(name)
+    if variable and not os.getenv(variable):
+        raise ValueError(f"{kind} provider {name!r} needs the {variable} environment variable")
+    return name
+
+
+def create_llm_client() -> LazyClient:
+    """Returns the configured LLM client, wrapped in LLMRouter when a fallback provider is set."""
+    primary = _choose("LLM", LLM_PROVIDERS, os.getenv("LLM_PROVIDER", DEFAULT_LLM_PROVIDER))
+    fallback = os.getenv("LLM_FALLBACK_PROVIDER")
+    if fallback is None:
+        fallback = "openai" if os.getenv("OPENAI_API_KEY") and primary != "openai" else "none"
+    fallback = None if fallback.strip().lower() == "none" else _choose("LLM", LLM_PROVIDERS, fallback)
+
+    def build():
+        client = LLM_PROVIDERS[primary]()
+        if fallback is None:
+            return client
+        # Hedge slow primary calls with the fallback and fail over when the primary errors
+        return LLMRouter(client, LLM_PROVIDERS[fallback]())
+
+    return LazyClient(f"{primary}+{fallback}" if fallback else primary, build)
+
+
+def create_tts_client() -> LazyClient:
+    """Returns the configured TTS client. Its name is the client class name, which audio cache keys use."""
+    name = _choose("TTS", TTS_PROVIDERS, os.getenv("TTS_PROVIDER", DEFAULT_TTS_PROVIDER))
+    return LazyClient(TTS_PROVIDERS[name].__name__, TTS_PROVIDERS[name])
+
+
+def create_qloo_client() -> LazyClient:
+    return LazyClient("qloo", QlooClient)
@@ -0,0 +1,148 @@
+# replay_bundle.py
+#
+# A baked replay bundle holds a match's events plus the commentary text and
+# audio for each (event index, style), precomputed by bake.py.
+#
+# Layout:
+#   8 bytes   magic (BUNDLE_MAGIC)
+#   8 bytes   header length, unsigned little-endian
+#   header    UTF-8 JSON: match_id, mimetype, styles, events, and an index of
+#             [event_index, style, text_offset, text_length, audio_offset, audio_length]
+#   blobs     text and audio bytes; offsets are relative to the start of this region
+
+import json
+import mmap
+import os
+import struct
+import threading
+
+from event_sources import is_valid_match_id
+
+BUNDLE_MAGIC = b"SSBNDL1\n"
+BUNDLE_SUFFIX = ".bundle"
+_HEADER_LENGTH = struct.Struct("<Q")
+# Chunk size used when streaming audio out of a bundle
+BUNDLE_CHUNK_SIZE = 16 * 1024
+
+
+def write_bundle(path: str, match_id: str, events: list, entries: dict, mimetype: str):
+    """
+    Writes a bundle atomically. `entries` maps (event index, style) -> (text, audio bytes);
+    audio may be empty if synthesis failed, in which case the server voices the line live.
+    """
+    index, blobs, offset = [], [], 0
+    for (event_index, style), (text, audio) in sorted(entries.items()):
+        text_bytes = text.encode("utf-8")
+        audio = audio or b""
+        index.append([event_index, style, offset, len(text_bytes), offset + len(text_bytes), len(audio)])
+        blobs.extend((text_bytes, audio))
+        offset += len(text_bytes) + len(audio)
+
+    header = json.dumps({
+        "match_id": match_id,
+        "mimetype": mimetype,
+        "styles": sorted({style for _, style in entries}),
+        "events": events,
+        "index": index,
+    }, separators=(",", ":")).encode("utf-8")
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+class ReplayBundle:
+    """
+    Read-only view of a bundle file. The file is memory-mapped once; audio is
+    sliced straight out of the mapping, so serving a clip reads pages from the
+    OS page cache rather than building a per-request buffer.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a replay bundle")
+        header_start = len(BUNDLE_MAGIC) + _HEADER_LENGTH.size
+        (header_length,) = _HEADER_LENGTH.unpack_from(self._map, len(BUNDLE_MAGIC))
+        header = json.loads(self._map[header_start:header_start + header_length].decode("utf-8"))
+        self._blob_start = header_start + header_length
+
+        self.match_id = header["match_id"]
+        self.mimetype = header["mimetype"]
+        self.styles = frozenset(header["styles"])
+        self.events = header["events"]
+        self._index = {
+            (event_index, style): (text_offset, text_length, audio_offset, audio_length)
+            for event_index, style, text_offset, text_length, audio_offset, audio_length in header["index"]
+        }
+
+    def has(self, event_index: int, style: str) -> bool:
+        return (event_index, style) in self._index
+
+    def text(self, event_index: int, style: str):
+        """Returns the baked commentary text, or None if it wasn't baked."""
+        entry = self._index.get((event_index, style))
+        if entry is None:
+            return None
+        start = self._blob_start + entry[0]
+        return self._map[start:start + entry[1]].decode("utf-8")
+
+    def has_audio(self, event_index: int, style: str) -> bool:
+        entry = self._index.get((event_index, style))
+        return entry is not None and entry[3] > 0
+
+    def audio_length(self, event_index: int, style: str) -> int:
+        entry = self._index.get((event_index, style))
+        return entry[3] if entry else 0
+
+    def iter_audio(self, event_index: int, style: str, chunk_size: int = BUNDLE_CHUNK_SIZE):
+        """Yields the baked audio in chunks sliced from the mapping. Yields nothing if there is none."""
+        entry = self._index.get((event_index, style))
+        if entry is None:
+            return
+        start = self._blob_start + entry[2]
+        end = start + entry[3]
+        for offset in range(start, end, chunk_size):
+            yield self._map[offset:min(offset + chunk_size, end)]
+
+    def close(self):
+        self._map.close()
+
+
+class BundleStore:
+    """
+    Opens bundles from a directory on demand (`<match_id>.bundle`) and keeps them
+    mapped. A bundle that is re-baked in place is reopened on its next lookup.
+    """
+    def __init__(self, bundle_dir: str):
+        self.bundle_dir = bundle_dir
+        self._bundles = {}  # match_id -> (mtime, ReplayBundle)
+        self._lock = threading.Lock()
+
+    def path(self, match_id: str) -> str:
+        return os.path.join(self.bundle_dir, f"{match_id}{BUNDLE_SUFFIX}")
+
+    def get(self, match_id: str):
+        """Returns the ReplayBundle for a match, or None if none has been baked."""
+        if not is_valid_match_id(match_id):
+            return None
+        path = self.path(match_id)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._bundles.get(match_id)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            # The previous mapping may still be serving requests, so it is left for GC to close
+            bundle = ReplayBundle(path)
+            self._bundles[match_id] = (mtime, bundle)
+            return bundle
@@ -0,0 +1,89 @@
+# serving.py
+#
+# Request handling shared by the Flask (app.py) and ASGI (asgi_app.py) servers.
+# Each server only adapts these to its framework: reading the request, and
+# turning the result into a response (sync or async iteration).
+
+from collections import namedtuple
+import logging
+
+from broadcaster import format_sse
+from event_sources import ListEventSource, parse_replay_speed
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Audio for one commentary line. `length` is known for baked clips only; clips
+# voiced live are streamed from the TTS provider and `chunks` blocks between items.
+AudioClip = namedtuple("AudioClip", ["chunks", "mimetype", "length"])
+
+
+class StreamRequestError(Exception):
+    """A /start_game request that can't be served. The message is sent to the client as an SSE error event."""
+
+
+def sse_error_frame(message: str) -> str:
+    """SSE clients expect a stream, so errors are sent as a single error event."""
+    return format_sse({'error': message}, event="error")
+
+
+def open_commentary_stream(hub, bundle_store, open_event_source, user_taste: dict, match_id: str,
+                           last_event_id: str = None, speed: str = None, loop=None):
+    """
+    Returns (broadcaster, subscriber) for a /start_game request.
+    A reconnecting EventSource sends the id of the last frame it received; it
+    only gets the frames it missed instead of restarting the match. Otherwise the
+    viewer joins the match, started from its baked bundle if there is one, else
+    from `open_event_source(match_id)`. `speed` is the ?speed argument, e.g. "10"
+    for a 10x replay or "max" to replay as fast as possible.
+    Raises StreamRequestError when the request can't be served.
+    """
+    if not user_taste:
+        raise StreamRequestError('Please select a commentary profile first.')
+
+    resumed = hub.resume(match_id, last_event_id, user_taste, loop=loop)
+    if resumed is not None:
+        metrics.STREAM_RESUMES.inc()
+        return resumed
+
+    bundle = bundle_store.get(match_id)
+    events = ListEventSource(bundle.events) if bundle else open_event_source(match_id)
+    if events is None:
+        raise StreamRequestError(f"Unknown match: {match_id}")
+    try:
+        replay_speed = parse_replay_speed(speed)
+    except ValueError:
+        raise StreamRequestError("Invalid replay speed.")
+
+    # Every viewer of the same match shares one producer; commentary is generated
+    # once per event and taste style, then fanned out to all subscribers.
+    return hub.subscribe(match_id, events, user_taste, loop=loop, replay_speed=replay_speed, bundle=bundle)
+
+
+def commentary_audio(hub, bundle_store, tts_client, match_id: str, event_index: int, style: str):
+    """
+    Returns the AudioClip for one commentary line, or None if it has no commentary yet.
+    Baked clips are sliced straight from the memory-mapped bundle, with no provider
+    call, unless the live scheduler put a different line (a coalesced summary) on
+    that index. Other lines are streamed from the TTS provider in its native format.
+    """
+    broadcaster = hub.find(match_id)
+    commentary_text = broadcaster.commentary.get((event_index, style)) if broadcaster else None
+    bundle = bundle_store.get(match_id)
+    if (bundle is not None and bundle.has_audio(event_index, style)
+            and commentary_text in (None, bundle.text(event_index, style))):
+        length = bundle.audio_length(event_index, style)
+        return AudioClip(bundle.iter_audio(event_index, style), bundle.mimetype, length)
+
+    if not commentary_text:
+        return None
+    return AudioClip(_voice(tts_client, commentary_text, match_id, event_index), tts_client.mimetype, None)
+
+
+def _voice(tts_client, commentary_text: str, match_id: str, event_index: int):
+    try:
+        yield from tts_client.text_to_speech_stream(commentary_text)
+    except Exception as e:
+        # Headers are already sent, so the best we can do is end the stream early
+        logger.error("Error streaming audio for %s/%s: %s", match_id, event_index, e)
+        metrics.ERRORS.inc(component="tts")
@@ -0,0 +1,74 @@
+# test_app.py
+
+import asyncio
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+import app as sportsync
+from replay_bundle import BundleStore, write_bundle
+
+EVENTS = [
+    {"time": 0, "event_type": "corner", "team": "A"},
+    {"time": 1, "event_type": "possession_change", "team": "B"},
+]
+
+
+class StubTTSClient:
+    mimetype = "audio/mpeg"
+
+    def text_to_speech_stream(self, text: str):
+        yield f"live:{text}".encode()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    write_bundle(str(tmp_path / "final.bundle"), "final", EVENTS,
+                 {(1, "balanced"): ("Baked line.", b"baked-audio")}, "audio/mpeg")
+    monkeypatch.setattr(sportsync, "bundle_store", BundleStore(str(tmp_path)))
+    monkeypatch.setattr(sportsync, "gtts_client", StubTTSClient())
+    monkeypatch.setattr(sportsync.broadcast_hub, "_finished", OrderedDict())
+    return sportsync.app.test_client()
+
+
+def test_audio_is_served_from_the_bundle(client):
+    response = client.get("/audio/final/1?style=balanced")
+    assert response.data == b"baked-audio"
+
+
+def test_audio_voices_the_live_line_when_it_differs_from_the_bundle(client):
+    # The scheduler coalesced both events into a summary emitted under index 1
+    broadcaster = SimpleNamespace(commentary={(1, "balanced"): "Summary line."})
+    sportsync.broadcast_hub._finished["final"] = broadcaster
+
+    response = client.get("/audio/final/1?style=balanced")
+    assert response.data == b"live:Summary line."
+
+
+@pytest.mark.parametrize("query, profile, message", [
+    ("match=demo", None, "Please select a commentary profile first."),
+    ("match=../etc", {"style": "balanced"}, "Unknown match: ../etc"),
+    ("match=demo&speed=nan", {"style": "balanced"}, "Invalid replay speed."),
+])
+def test_start_game_errors_are_sent_as_sse_error_events(client, query, profile, message):
+    if profile is not None:
+        with client.session_transaction() as session:
+            session["taste_profile"] = profile
+    response = client.get(f"/start_game?{query}")
+    assert response.mimetype == "text/event-stream"
+    assert response.get_data(as_text=True) == f'event: error\ndata: {{"error": "{message}"}}\n\n'
+
+
+def test_asgi_audio_uses_the_same_bundle_rules(client, monkeypatch):
+    import asgi_app
+
+    async def fetch(path: str) -> bytes:
+        response = await asgi_app.app.test_client().get(path)
+        return await response.get_data()
+
+    for name in ("bundle_store", "gtts_client", "broadcast_hub"):
+        monkeypatch.setattr(asgi_app, name, getattr(sportsync, name))
+    assert asyncio.run(fetch("/audio/final/1?style=balanced")) == b"baked-audio"
+    sportsync.broadcast_hub._finished["final"] = SimpleNamespace(commentary={(1, "balanced"): "Summary line."})
+    assert asyncio.run(fetch("/audio/final/1?style=balanced")) == b"live:Summary line."
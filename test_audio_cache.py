@@ -0,0 +1,64 @@
+# test_audio_cache.py
+
+import threading
+import time
+
+import pytest
+
+from audio_cache import AudioCache, CachedTTSClient
+
+
+class SlowTTSClient:
+    voice = "test-voice"
+    mimetype = "audio/mpeg"
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = 0
+
+    def text_to_speech_stream(self, text: str):
+        self.calls += 1
+        for part in range(4):
+            time.sleep(0.02)
+            if self.fail and part == 2:
+                raise OSError("synthesis failed")
+            yield f"{text}:{part};".encode()
+
+
+def test_concurrent_misses_share_one_synthesis():
+    tts = SlowTTSClient()
+    client = CachedTTSClient(tts, AudioCache())
+    results = []
+
+    def listen(text: str, leave_early: bool = False):
+        chunks = client.text_to_speech_stream(text)
+        if leave_early:
+            next(chunks)
+            chunks.close()
+            return
+        results.append((text, b"".join(chunks)))
+
+    viewers = [threading.Thread(target=listen, args=(f"line{i % 2}", i == 0)) for i in range(10)]
+    for viewer in viewers:
+        viewer.start()
+    for viewer in viewers:
+        viewer.join()
+
+    assert tts.calls == 2
+    assert len(results) == 9
+    for text, audio in results:
+        assert audio == b"".join(f"{text}:{part};".encode() for part in range(4))
+    # Both clips were cached, so the next request doesn't synthesize at all
+    assert client.text_to_speech("line0") == b"line0:0;line0:1;line0:2;line0:3;"
+    assert tts.calls == 2
+
+
+def test_failed_synthesis_is_not_cached_and_can_be_retried():
+    tts = SlowTTSClient(fail=True)
+    client = CachedTTSClient(tts, AudioCache())
+
+    with pytest.raises(OSError):
+        client.text_to_speech("line")
+    tts.fail = False
+    assert client.text_to_speech("line") == b"line:0;line:1;line:2;line:3;"
+    assert tts.calls == 2
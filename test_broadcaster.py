@@ -0,0 +1,110 @@
+# test_broadcaster.py
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import pytest
+
+from api_clients import OPENAI_ERROR_MESSAGE
+from broadcaster import REPLAY_BUFFER_FRAMES, BroadcastHub, MatchBroadcaster, format_sse
+from commentary_cache import CommentaryCache
+from commentary_generator import CommentaryGenerator
+from commentary_templates import render_commentary
+
+
+class DownLLMClient:
+    """LLM client that fails fast, answering every call with the error placeholder like the real clients do."""
+    model_name = "down"
+
+    def generate_commentary(self, prompt: str, max_tokens: int = None) -> str:
+        return OPENAI_ERROR_MESSAGE
+
+    def generate_commentary_stream(self, prompt: str):
+        yield OPENAI_ERROR_MESSAGE
+
+
+class UpLLMClient:
+    model_name = "up"
+    line = "Ronaldo rises and heads it in!"
+
+    def generate_commentary(self, prompt: str, max_tokens: int = None) -> str:
+        return self.line
+
+    def generate_commentary_stream(self, prompt: str):
+        yield self.line
+
+
+def test_delta_frames_are_not_replayed(make_broadcaster, drain):
+    broadcaster = make_broadcaster()
+    broadcaster._publish(format_sse({"n": 1}, event="template"), style="balanced")
+    for n in range(REPLAY_BUFFER_FRAMES):
+        broadcaster._publish(format_sse({"n": n}, event="delta"), style="balanced", replayable=False)
+    broadcaster._publish(format_sse({"n": 2}, event="complete"), style="balanced")
+
+    frames = drain(broadcaster.subscribe({"style": "balanced"}, after=0))
+    assert [frame.splitlines()[1] for frame in frames] == ["event: template", "event: complete"]
+
+
+def test_resume_past_the_buffer_is_told_about_the_gap(make_broadcaster, drain):
+    broadcaster = make_broadcaster()
+    for n in range(REPLAY_BUFFER_FRAMES + 10):
+        broadcaster._publish(format_sse({"n": n}, event="complete"), style="balanced")
+
+    frames = drain(broadcaster.subscribe({"style": "balanced"}, after=5))
+    assert "event: resync" in frames[0]
+    assert len(frames) == REPLAY_BUFFER_FRAMES + 1
+
+    frames = drain(broadcaster.subscribe({"style": "balanced"}, after=20))
+    assert not any("event: resync" in frame for frame in frames)
+
+
+@pytest.mark.parametrize("stream_tokens", [False, True])
+def test_failed_llm_line_is_sent_and_voiced_as_the_template(stream_tokens, make_broadcaster, drain, goal_event):
+    generator = CommentaryGenerator(DownLLMClient(), cache=CommentaryCache())
+    broadcaster = make_broadcaster(generator, stream_tokens=stream_tokens)
+    profile = {"style": "emotional"}
+    subscriber = broadcaster.subscribe(profile)
+    if not stream_tokens:
+        # The prefetch has already failed by emit time, so it counts as ready and no template is sent first
+        broadcaster.prefetcher.prefetch(0, goal_event, {"emotional": profile})
+        while not broadcaster.prefetcher.ready(0, "emotional"):
+            time.sleep(0.01)
+
+    broadcaster._emit(0, goal_event, 0.0)
+
+    frames = drain(subscriber)
+    assert not any(OPENAI_ERROR_MESSAGE in frame for frame in frames)
+    template = render_commentary(goal_event, "emotional")
+    assert any(template in frame for frame in frames)
+    assert broadcaster.commentary[(0, "emotional")] == template
+
+
+def test_live_generation_does_not_queue_behind_prefetch_work(make_broadcaster, generation_pool, drain, goal_event):
+    live_pool = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    # Every prefetch worker is held up, e.g. waiting in the governor
+    for _ in range(generation_pool._max_workers):
+        generation_pool.submit(release.wait)
+    generator = CommentaryGenerator(UpLLMClient(), cache=CommentaryCache())
+    broadcaster = make_broadcaster(generator, live_executor=live_pool)
+    subscriber = broadcaster.subscribe({"style": "emotional"})
+
+    broadcaster._emit(0, goal_event, 0.0)
+    live_pool.shutdown()
+
+    assert broadcaster.commentary[(0, "emotional")] == UpLLMClient.line
+    release.set()
+    assert any("event: upgrade" in frame for frame in drain(subscriber))
+
+
+def test_hub_keeps_a_bounded_number_of_finished_matches(generation_pool):
+    hub = BroadcastHub(None, executor=generation_pool, live_executor=generation_pool, max_finished=2)
+    for match_id in ("a", "b"):
+        hub._remove(MatchBroadcaster(match_id, [], None, hub.executor))
+    assert hub.find("a") is not None
+    hub._remove(MatchBroadcaster("c", [], None, hub.executor))
+
+    # "b" was the least recently used, since "a" was just looked up
+    assert hub.find("b") is None
+    assert hub.find("a") is not None and hub.find("c") is not None
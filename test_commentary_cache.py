@@ -0,0 +1,56 @@
+# test_commentary_cache.py
+
+import time
+
+from commentary_cache import CommentaryCache
+
+
+def test_key_ignores_whitespace_but_not_the_model():
+    key = CommentaryCache.make_key("Describe  the goal.\n", "gemini")
+    assert key == CommentaryCache.make_key("Describe the goal.", "gemini")
+    assert key != CommentaryCache.make_key("Describe the goal.", "openai")
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = CommentaryCache(max_entries=2)
+    cache.put("a", "line a")
+    cache.put("b", "line b")
+    assert cache.get("a") == "line a"
+    cache.put("c", "line c")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "line a" and cache.get("c") == "line c"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entry_is_a_miss(monkeypatch):
+    cache = CommentaryCache(ttl_seconds=60)
+    cache.put("a", "line a")
+    later = time.time() + 61
+    monkeypatch.setattr(time, "time", lambda: later)
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_sqlite_tier_survives_a_restart(tmp_path):
+    db_path = str(tmp_path / "commentary.db")
+    CommentaryCache(db_path=db_path).put("a", "line a")
+
+    cache = CommentaryCache(db_path=db_path)
+    assert cache.get("a") == "line a"
+    assert cache.stats()["disk_hits"] == 1
+    # Promoted to memory, so the next lookup doesn't touch the database
+    assert cache.get("a") == "line a"
+    assert cache.stats()["hits"] == 1
+
+
+def test_expired_sqlite_entry_is_deleted(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "commentary.db")
+    CommentaryCache(db_path=db_path, ttl_seconds=60).put("a", "line a")
+    later = time.time() + 61
+    monkeypatch.setattr(time, "time", lambda: later)
+
+    cache = CommentaryCache(db_path=db_path, ttl_seconds=60)
+    assert cache.get("a") is None
+    assert cache._db.execute("SELECT COUNT(*) FROM commentary").fetchone()[0] == 0
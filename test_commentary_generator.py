@@ -0,0 +1,51 @@
+# test_commentary_generator.py
+
+import pytest
+
+from api_clients import StreamInterrupted
+from commentary_cache import CommentaryCache
+from commentary_generator import CommentaryGenerator
+from commentary_templates import render_commentary
+
+PROFILE = {"style": "emotional", "focus": ["passion"]}
+
+
+class BreakingStreamClient:
+    """Streams two chunks, then fails the way the Gemini and OpenAI clients do mid-stream."""
+    model_name = "breaking"
+
+    def generate_commentary(self, prompt: str, max_tokens: int = None) -> str:
+        return "Ronaldo rises and heads it in!"
+
+    def generate_commentary_stream(self, prompt: str):
+        yield "Ronaldo rises "
+        yield "and heads it"
+        raise StreamInterrupted("connection reset")
+
+
+def test_interrupted_stream_is_not_cached(goal_event):
+    cache = CommentaryCache()
+    generator = CommentaryGenerator(BreakingStreamClient(), cache=cache)
+
+    chunks = []
+    with pytest.raises(StreamInterrupted):
+        for chunk in generator.stream_commentary(goal_event, PROFILE):
+            chunks.append(chunk)
+
+    assert "".join(chunks) == "Ronaldo rises and heads it"
+    key = cache.make_key(generator.generate_prompt(goal_event, PROFILE), generator.model_id)
+    assert cache.get(key) is None
+
+
+def test_interrupted_stream_ends_on_the_template_line(make_broadcaster, drain, frame_data, goal_event):
+    generator = CommentaryGenerator(BreakingStreamClient(), cache=CommentaryCache())
+    broadcaster = make_broadcaster(generator, lookahead=0, instant_templates=False)
+    subscriber = broadcaster.subscribe(PROFILE)
+
+    broadcaster._emit(0, goal_event, 0.0)
+
+    final = [frame for frame in drain(subscriber) if "event: complete" in frame]
+    assert len(final) == 1
+    data = frame_data(final[0])
+    assert data["commentary"] == render_commentary(goal_event, "emotional")
+    assert broadcaster.commentary[(0, "emotional")] == data["commentary"]
@@ -0,0 +1,121 @@
+# test_event_scheduler.py
+
+from commentary_templates import render_description
+from event_scheduler import DeadlineScheduler
+import metrics
+
+
+class FakeGenerator:
+    """Commentary generator whose text is the event's description, so tests can tell events apart."""
+    def __init__(self):
+        self.calls = []
+
+    def get_commentary(self, event: dict, user_taste_profile: dict) -> str:
+        self.calls.append(event["event_type"])
+        return render_description(event)
+
+    def get_commentary_batch(self, event: dict, user_taste_profiles: dict) -> dict:
+        return {style: self.get_commentary(event, profile) for style, profile in user_taste_profiles.items()}
+
+
+def backlog(now: float) -> list:
+    events = [
+        {"time": 0, "event_type": "kick_off", "score": "0-0"},
+        {"time": 1, "event_type": "corner", "team": "A", "score": "0-0"},
+        {"time": 2, "event_type": "possession_change", "team": "B", "score": "0-0"},
+        {"time": 3, "event_type": "corner", "team": "B", "score": "0-0"},
+    ]
+    return [(index, event, now - 1) for index, event in enumerate(events)]
+
+
+def test_plan_coalesces_low_priority_run_and_discards_every_merged_index():
+    work, discarded = DeadlineScheduler().plan(backlog(100.0), 100.0)
+
+    assert [event["event_type"] for _, event, _ in work] == ["kick_off", "summary"]
+    summary_index, summary, _ = work[1]
+    assert summary_index == 3
+    assert [event["event_type"] for event in summary["events"]] == ["corner", "possession_change", "corner"]
+    # The summary's own index is discarded too, so its single-event prefetch is never reused
+    assert sorted(discarded) == [1, 2, 3]
+
+
+def test_plan_drops_low_priority_events_past_deadline():
+    due = [(0, {"time": 0, "event_type": "kick_off"}, 0.0), (1, {"time": 1, "event_type": "corner"}, 0.0)]
+    work, discarded = DeadlineScheduler().plan(due, 60.0)
+
+    assert [index for index, _, _ in work] == [0]
+    assert discarded == [1]
+
+
+def test_coalesced_summary_is_emitted_with_its_own_commentary(make_broadcaster, drain, frame_data):
+    generator = FakeGenerator()
+    broadcaster = make_broadcaster(generator, stream_tokens=False, instant_templates=False,
+                                   scheduler=DeadlineScheduler())
+    profile = {"style": "balanced"}
+    subscriber = broadcaster.subscribe(profile)
+
+    due = backlog(100.0)
+    # The lookahead window had already prefetched every event individually
+    for index, event, _ in due:
+        broadcaster.prefetcher.prefetch(index, event, {"balanced": profile})
+    work, discarded = broadcaster.scheduler.plan(due, 100.0)
+    for index in discarded:
+        broadcaster.prefetcher.discard(index)
+    for index, event, scheduled_at in work:
+        broadcaster._emit(index, event, scheduled_at)
+
+    summaries = [data for data in map(frame_data, drain(subscriber)) if data["event_type"] == "summary"]
+    assert len(summaries) == 1
+    commentary = summaries[0]["commentary"]
+    # The text describes every merged event, not just the last corner prefetched on its own
+    assert commentary == render_description(work[1][1])
+    assert "Corner kick for A." in commentary and "Possession changes hands" in commentary
+    assert generator.calls.count("summary") == 1
+
+
+def test_plan_does_not_coalesce_across_a_high_priority_event():
+    events = ["corner", "possession_change", "shot_on_goal", "corner", "possession_change"]
+    due = [(index, {"time": index, "event_type": event_type}, 99.0) for index, event_type in enumerate(events)]
+    work, discarded = DeadlineScheduler().plan(due, 100.0)
+
+    assert [event["event_type"] for _, event, _ in work] == ["summary", "shot_on_goal", "summary"]
+    assert [[e["event_type"] for e in event["events"]] for _, event, _ in (work[0], work[2])] == [
+        ["corner", "possession_change"], ["corner", "possession_change"]
+    ]
+
+
+def test_plan_does_not_coalesce_across_a_dropped_event():
+    due = [
+        (0, {"time": 0, "event_type": "corner"}, 99.0),
+        (1, {"time": 1, "event_type": "foul"}, 0.0),
+        (2, {"time": 2, "event_type": "possession_change"}, 99.0),
+    ]
+    work, discarded = DeadlineScheduler().plan(due, 100.0)
+
+    assert [index for index, _, _ in work] == [0, 2]
+    assert [event["event_type"] for _, event, _ in work] == ["corner", "possession_change"]
+    assert discarded == [1]
+
+
+def test_plan_keeps_match_order_and_ends_with_end_game():
+    events = ["corner", "shot_on_goal", "possession_change", "foul", "end_game"]
+    due = [(index, {"time": index, "event_type": event_type}, 99.0) for index, event_type in enumerate(events)]
+    work, discarded = DeadlineScheduler().plan(due, 100.0)
+
+    assert [event["event_type"] for _, event, _ in work] == events
+    assert [index for index, _, _ in work] == [0, 1, 2, 3, 4]
+    assert discarded == []
+
+
+def test_plan_exports_its_counts_as_metrics():
+    def count(reason: str) -> float:
+        return metrics.SCHEDULER_EVENTS.value(reason=reason)
+
+    before = {reason: count(reason) for reason in ("dropped", "coalesced", "late")}
+    due = backlog(100.0) + [(4, {"time": 4, "event_type": "foul"}, 0.0), (5, {"time": 5, "event_type": "end_game"}, 0.0)]
+    DeadlineScheduler().plan(due, 100.0)
+
+    assert count("coalesced") - before["coalesced"] == 3
+    assert count("dropped") - before["dropped"] == 1
+    assert count("late") - before["late"] == 1
+    assert 'sportsync_scheduler_events_total{reason="coalesced"}' in metrics.REGISTRY.render()
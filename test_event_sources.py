@@ -0,0 +1,80 @@
+# test_event_sources.py
+
+import io
+import json
+import socket
+import threading
+
+import pytest
+
+from event_sources import (
+    AS_FAST_AS_POSSIBLE, EventSource, JSONLEventSource, StdinEventSource, TCPEventSource, is_valid_match_id,
+    parse_replay_speed
+)
+
+LINES = [
+    json.dumps({"time": 0, "event_type": "kick_off"}),
+    "",
+    "not json",
+    json.dumps({"time": 5}),
+    json.dumps({"event_type": "corner"}),
+]
+
+
+@pytest.mark.parametrize("value, speed", [
+    (None, 1.0), ("", 1.0), ("1", 1.0), ("10", 10.0), ("0.5", 0.5),
+    ("max", AS_FAST_AS_POSSIBLE), ("ASAP", AS_FAST_AS_POSSIBLE), ("0", AS_FAST_AS_POSSIBLE),
+])
+def test_parse_replay_speed(value, speed):
+    assert parse_replay_speed(value) == speed
+
+
+@pytest.mark.parametrize("value", ["-1", "fast", "nan", "inf", "-inf"])
+def test_parse_replay_speed_rejects_invalid_values(value):
+    with pytest.raises(ValueError):
+        parse_replay_speed(value)
+
+
+@pytest.mark.parametrize("match_id, valid", [("final", True), ("bench-12", True), ("../x", False), ("a.b", False)])
+def test_is_valid_match_id(match_id, valid):
+    assert is_valid_match_id(match_id) == valid
+
+
+def test_event_source_must_implement_iter():
+    with pytest.raises(TypeError):
+        EventSource()
+
+
+def test_jsonl_source_skips_bad_lines_and_defaults_time(tmp_path):
+    path = tmp_path / "match.jsonl"
+    path.write_text("\n".join(LINES), encoding="utf-8")
+    source = JSONLEventSource(str(path))
+
+    assert not source.live
+    expected = [{"time": 0, "event_type": "kick_off"}, {"time": 0, "event_type": "corner"}]
+    assert list(source) == expected
+    # Each iteration reads the file again
+    assert list(source) == expected
+
+
+def test_stdin_source_is_live():
+    source = StdinEventSource(io.StringIO("\n".join(LINES)))
+    assert source.live
+    assert [event["event_type"] for event in source] == ["kick_off", "corner"]
+
+
+def test_tcp_source_reads_a_feed_until_it_closes():
+    server = socket.create_server(("127.0.0.1", 0))
+    port = server.getsockname()[1]
+
+    def feed():
+        conn, _ = server.accept()
+        with conn:
+            conn.sendall(("\n".join(LINES) + "\n").encode("utf-8"))
+        server.close()
+
+    threading.Thread(target=feed, daemon=True).start()
+    source = TCPEventSource("127.0.0.1", port)
+
+    assert source.live
+    assert [event["event_type"] for event in source] == ["kick_off", "corner"]
@@ -0,0 +1,81 @@
+# test_llm_router.py
+
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import llm_router
+from api_clients import OPENAI_ERROR_MESSAGE
+from llm_router import CIRCUIT_FAILURE_THRESHOLD, LLMRouter
+
+
+class FakeClient:
+    def __init__(self, model_name: str, text: str, delay: float = 0.0):
+        self.model_name = model_name
+        self.text = text
+        self.delay = delay
+        self.calls = 0
+
+    def generate_commentary(self, prompt: str, max_tokens: int = None) -> str:
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.text
+
+    def generate_commentary_stream(self, prompt: str):
+        self.calls += 1
+        yield self.text
+
+
+def open_circuit(router: LLMRouter, client):
+    stats = router._stats(client)
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+        stats.record(False, 0.1)
+    assert stats.opened_at is not None
+
+
+def test_unused_backup_does_not_keep_its_half_open_trial(monkeypatch):
+    primary = FakeClient("primary", "Primary line.")
+    secondary = FakeClient("secondary", OPENAI_ERROR_MESSAGE)
+    router = LLMRouter(primary, secondary)
+    open_circuit(router, secondary)
+    # Let the secondary's cooldown pass, so its next allow_request() would be a half-open trial
+    monkeypatch.setattr(llm_router, "CIRCUIT_COOLDOWN_SECONDS", 0.0)
+
+    # The primary answers before the hedge delay, so the secondary is never called
+    assert router.generate_commentary("prompt") == "Primary line."
+    assert "".join(router.generate_commentary_stream("prompt")) == "Primary line."
+    assert secondary.calls == 0
+    assert router._stats(secondary).allow_request()
+
+
+def test_half_open_backup_is_tried_when_the_primary_fails(monkeypatch):
+    primary = FakeClient("primary", OPENAI_ERROR_MESSAGE)
+    secondary = FakeClient("secondary", "Backup line.")
+    router = LLMRouter(primary, secondary)
+    open_circuit(router, secondary)
+    monkeypatch.setattr(llm_router, "CIRCUIT_COOLDOWN_SECONDS", 0.0)
+
+    assert router.generate_commentary("prompt") == "Backup line."
+    stats = router._stats(secondary)
+    assert stats.opened_at is None
+    assert stats.allow_request()
+
+
+def test_router_pool_follows_the_generation_pool(monkeypatch):
+    monkeypatch.setenv("GENERATION_WORKERS", "24")
+    monkeypatch.setenv("LIVE_GENERATION_WORKERS", "8")
+    router = LLMRouter(FakeClient("primary", "Primary line."), FakeClient("secondary", "Backup line."))
+    assert router._executor._max_workers == 64
+
+
+def test_time_queued_for_a_router_thread_does_not_trigger_hedges():
+    primary = FakeClient("primary", "Primary line.", delay=0.3)
+    secondary = FakeClient("secondary", "Backup line.")
+    # More callers than router threads, so later primaries queue for well over the hedge delay
+    router = LLMRouter(primary, secondary, max_workers=2)
+    router._stats(primary).latencies.extend([0.6] * 20)
+
+    with ThreadPoolExecutor(max_workers=12) as callers:
+        results = list(callers.map(lambda _: router.generate_commentary("prompt"), range(12)))
+
+    assert results == ["Primary line."] * 12
+    assert secondary.calls == 0
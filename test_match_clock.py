@@ -0,0 +1,49 @@
+# test_match_clock.py
+
+import threading
+import time
+
+import pytest
+
+from match_clock import MatchClock
+
+
+def test_timers_fire_in_due_order_whatever_order_they_were_added_in():
+    clock = MatchClock(max_workers=1)
+    fired, done = [], threading.Event()
+    now = time.time()
+    for name, delay in (("third", 0.15), ("first", 0.05), ("second", 0.1)):
+        clock.call_at(now + delay, fired.append, name)
+    clock.call_at(now + 0.2, done.set)
+
+    assert done.wait(2.0)
+    assert fired == ["first", "second", "third"]
+    assert clock.pending() == 0
+
+
+def test_timer_does_not_fire_early():
+    clock = MatchClock()
+    fired_at, done = [], threading.Event()
+    due = time.time() + 0.1
+    clock.call_at(due, lambda: (fired_at.append(time.time()), done.set()))
+
+    assert done.wait(2.0)
+    assert fired_at[0] >= due
+
+
+def test_slow_callback_does_not_delay_other_timers():
+    clock = MatchClock(max_workers=2)
+    release, fast_done = threading.Event(), threading.Event()
+    clock.call_soon(release.wait, 2.0)
+    clock.call_at(time.time() + 0.05, fast_done.set)
+
+    assert fast_done.wait(1.0)
+    release.set()
+
+
+@pytest.mark.parametrize("when", [float("nan"), float("inf")])
+def test_non_finite_due_time_is_rejected(when):
+    clock = MatchClock()
+    with pytest.raises(ValueError):
+        clock.call_at(when, print)
+    assert clock.pending() == 0
@@ -0,0 +1,60 @@
+# test_metrics.py
+
+import pytest
+
+from metrics import Counter, Gauge, Histogram, Registry
+
+
+@pytest.fixture
+def registry() -> Registry:
+    return Registry()
+
+
+def test_counter_renders_one_sample_per_label_set(registry):
+    counter = Counter("test_lookups_total", "Lookups by result.", registry=registry)
+    counter.inc(result="hit")
+    counter.inc(2, result="hit")
+    counter.inc(result='say "miss"')
+
+    assert counter.value(result="hit") == 3
+    assert registry.render() == (
+        "# HELP test_lookups_total Lookups by result.\n"
+        "# TYPE test_lookups_total counter\n"
+        'test_lookups_total{result="hit"} 3\n'
+        'test_lookups_total{result="say \\"miss\\""} 1\n'
+    )
+
+
+def test_gauge_goes_up_and_down(registry):
+    gauge = Gauge("test_open", "Open things.", registry=registry)
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    gauge.set(1.5, provider="a")
+
+    assert gauge.value() == 1
+    assert "test_open 1\n" in registry.render()
+    assert 'test_open{provider="a"} 1.5\n' in registry.render()
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    histogram = Histogram("test_seconds", "Durations.", buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value)
+
+    lines = registry.render().splitlines()
+    assert lines[1] == "# TYPE test_seconds histogram"
+    assert lines[2:] == [
+        'test_seconds_bucket{le="0.1"} 1',
+        'test_seconds_bucket{le="1"} 3',
+        'test_seconds_bucket{le="+Inf"} 4',
+        "test_seconds_sum 4.05",
+        "test_seconds_count 4",
+    ]
+
+
+def test_histogram_times_a_block_even_if_it_raises(registry):
+    histogram = Histogram("test_seconds", "Durations.", registry=registry)
+    with pytest.raises(RuntimeError), histogram.time(stage="emit"):
+        raise RuntimeError("boom")
+    assert 'test_seconds_count{stage="emit"} 1' in registry.render()
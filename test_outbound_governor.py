@@ -0,0 +1,123 @@
+# test_outbound_governor.py
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from outbound_governor import (
+    CONGESTION_BACKOFF, PRIORITY_BAKE, PRIORITY_LIVE, PRIORITY_PREFETCH, RATE_LIMITED_BACKOFF,
+    GovernorOverloaded, ProviderGovernor, call_priority
+)
+
+
+class RateLimitError(Exception):
+    """Shaped like an SDK's 429 error: a status code, and the response's headers."""
+    def __init__(self, retry_after: str = None):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.response = SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+
+def wait_for(condition, timeout: float = 2.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def waiting(governor: ProviderGovernor) -> int:
+    return governor.snapshot()["waiting"]
+
+
+def start_call(governor: ProviderGovernor, priority: int, order: list, errors: list = None) -> threading.Thread:
+    def call():
+        try:
+            with call_priority(priority), governor.slot():
+                order.append(priority)
+        except GovernorOverloaded:
+            errors.append(priority)
+
+    thread = threading.Thread(target=call)
+    thread.start()
+    return thread
+
+
+def test_waiting_calls_are_granted_in_priority_order():
+    governor = ProviderGovernor("test", initial_concurrency=1, max_concurrency=1)
+    order, threads = [], []
+    with governor.slot():
+        for count, priority in enumerate((PRIORITY_BAKE, PRIORITY_PREFETCH, PRIORITY_LIVE, PRIORITY_PREFETCH), 1):
+            threads.append(start_call(governor, priority, order))
+            wait_for(lambda: waiting(governor) == count)
+    for thread in threads:
+        thread.join()
+
+    assert order == [PRIORITY_LIVE, PRIORITY_PREFETCH, PRIORITY_PREFETCH, PRIORITY_BAKE]
+
+
+def test_full_queue_turns_away_the_least_urgent_call():
+    governor = ProviderGovernor("test", initial_concurrency=1, max_concurrency=1, max_queue=1)
+    order, errors = [], []
+    with governor.slot():
+        prefetch = start_call(governor, PRIORITY_PREFETCH, order, errors)
+        wait_for(lambda: waiting(governor) == 1)
+        # A live call displaces the waiting prefetch call
+        live = start_call(governor, PRIORITY_LIVE, order, errors)
+        prefetch.join()
+        assert errors == [PRIORITY_PREFETCH]
+        # A bake call can't displace the live one, so it is turned away itself
+        with pytest.raises(GovernorOverloaded), call_priority(PRIORITY_BAKE), governor.slot():
+            pass
+    live.join()
+
+    assert order == [PRIORITY_LIVE]
+    assert governor.snapshot()["rejected"] == 2
+
+
+def test_limit_grows_additively_on_fast_successes():
+    governor = ProviderGovernor("test", initial_concurrency=4, max_concurrency=16)
+    with governor.slot():
+        pass
+    assert governor.limit == pytest.approx(4.25)
+    for _ in range(20):
+        with governor.slot():
+            pass
+    assert 5 < governor.limit < 16
+
+
+def test_rate_limit_halves_the_limit_once_per_burst():
+    governor = ProviderGovernor("test", initial_concurrency=8, max_concurrency=16)
+    for _ in range(3):
+        with pytest.raises(RateLimitError), governor.slot():
+            raise RateLimitError(retry_after="0")
+    assert governor.limit == 8 * RATE_LIMITED_BACKOFF
+    assert governor.snapshot()["rate_limited"] == 3
+
+
+def test_congested_call_shrinks_the_limit():
+    governor = ProviderGovernor("test", initial_concurrency=8, max_concurrency=16)
+    governor.baseline_latency = 0.001
+    with governor.slot():
+        time.sleep(0.02)
+    assert governor.limit == pytest.approx(8 * CONGESTION_BACKOFF)
+
+
+def test_retry_after_pauses_the_next_call():
+    governor = ProviderGovernor("test", initial_concurrency=4, max_concurrency=16)
+    with pytest.raises(RateLimitError), governor.slot():
+        raise RateLimitError(retry_after="0.2")
+
+    started = time.time()
+    with governor.slot():
+        pass
+    assert time.time() - started >= 0.18
+
+
+def test_other_errors_leave_the_limit_alone():
+    governor = ProviderGovernor("test", initial_concurrency=4, max_concurrency=16)
+    with pytest.raises(ValueError), governor.slot():
+        raise ValueError("bad response")
+    assert governor.limit == 4
+    assert governor.snapshot()["in_flight"] == 0
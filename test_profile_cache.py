@@ -0,0 +1,31 @@
+# test_profile_cache.py
+
+import time
+
+from profile_cache import TasteProfileCache
+
+
+def load_profile(user_data: dict) -> dict:
+    return {"style": user_data.get("preference_type", "balanced")}
+
+
+def test_cache_is_bounded_and_evicts_least_recently_used():
+    cache = TasteProfileCache(load_profile, max_entries=3)
+    for user_id in ("a", "b", "c"):
+        cache.get({"user_id": user_id, "preference_type": "emotional"})
+    cache.get({"user_id": "a", "preference_type": "emotional"})
+    cache.get({"user_id": "d", "preference_type": "emotional"})
+
+    assert cache.stats()["entries"] == 3
+    assert cache.get_cached({"user_id": "a", "preference_type": "emotional"}) is not None
+    assert cache.get_cached({"user_id": "b", "preference_type": "emotional"}) is None
+
+
+def test_expired_entries_are_swept_on_insert():
+    cache = TasteProfileCache(load_profile, ttl_seconds=0.01, max_stale_seconds=0.01)
+    for user_id in range(20):
+        cache.get({"user_id": user_id})
+    time.sleep(0.05)
+    cache.get({"user_id": "new"})
+
+    assert cache.stats()["entries"] == 1
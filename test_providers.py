@@ -0,0 +1,34 @@
+# test_providers.py
+
+import pytest
+
+from providers import LazyClient, create_llm_client, create_tts_client
+
+
+def test_missing_api_key_fails_when_the_provider_is_chosen(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("LLM_PROVIDER", "openai")
+    with pytest.raises(ValueError, match="OPENAI_API_KEY"):
+        create_llm_client()
+
+    monkeypatch.delenv("ELEVENLABS_API_KEY", raising=False)
+    monkeypatch.setenv("TTS_PROVIDER", "elevenlabs")
+    with pytest.raises(ValueError, match="ELEVENLABS_API_KEY"):
+        create_tts_client()
+
+
+def test_explicit_fallback_without_its_key_is_rejected(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setenv("LLM_PROVIDER", "gemini")
+    monkeypatch.setenv("LLM_FALLBACK_PROVIDER", "openai")
+    with pytest.raises(ValueError, match="OPENAI_API_KEY"):
+        create_llm_client()
+
+
+def test_configured_provider_is_still_built_lazily(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("LLM_PROVIDER", "openai")
+    monkeypatch.setenv("LLM_FALLBACK_PROVIDER", "none")
+    client = create_llm_client()
+    assert isinstance(client, LazyClient)
+    assert client._client is None
@@ -0,0 +1,65 @@
+# test_replay_bundle.py
+
+import os
+
+import pytest
+
+from replay_bundle import BundleStore, ReplayBundle, write_bundle
+
+EVENTS = [{"time": 0, "event_type": "kick_off"}, {"time": 10, "event_type": "corner", "team": "A"}]
+ENTRIES = {
+    (0, "balanced"): ("And we're underway!", b"kick-off-audio" * 3),
+    (1, "balanced"): ("Corner kick for A.", b""),
+    (1, "emotional"): ("A corner! The crowd roars!", b"corner-audio"),
+}
+
+
+@pytest.fixture
+def bundle_path(tmp_path) -> str:
+    path = str(tmp_path / "final.bundle")
+    write_bundle(path, "final", EVENTS, ENTRIES, "audio/mpeg")
+    return path
+
+
+def test_round_trip(bundle_path):
+    bundle = ReplayBundle(bundle_path)
+
+    assert bundle.match_id == "final"
+    assert bundle.mimetype == "audio/mpeg"
+    assert bundle.styles == {"balanced", "emotional"}
+    assert bundle.events == EVENTS
+    for (index, style), (text, audio) in ENTRIES.items():
+        assert bundle.text(index, style) == text
+        assert bundle.has_audio(index, style) == bool(audio)
+        assert bundle.audio_length(index, style) == len(audio)
+        assert b"".join(bundle.iter_audio(index, style)) == audio
+    assert bundle.text(0, "humorous") is None
+    assert list(bundle.iter_audio(0, "humorous")) == []
+
+
+def test_audio_is_streamed_in_chunks(bundle_path):
+    chunks = list(ReplayBundle(bundle_path).iter_audio(0, "balanced", chunk_size=10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 10, 10, 2]
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "not.bundle"
+    path.write_bytes(b"not a bundle at all")
+    with pytest.raises(ValueError):
+        ReplayBundle(str(path))
+
+
+def test_store_reopens_a_rebaked_bundle(tmp_path, bundle_path):
+    store = BundleStore(str(tmp_path))
+    first = store.get("final")
+    assert store.get("final") is first
+
+    write_bundle(bundle_path, "final", EVENTS, {(0, "balanced"): ("Rebaked.", b"")}, "audio/mpeg")
+    stat = os.stat(bundle_path)
+    os.utime(bundle_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert store.get("final").text(0, "balanced") == "Rebaked."
+
+
+@pytest.mark.parametrize("match_id", ["missing", "../final", "final.bundle"])
+def test_store_returns_none_for_unknown_or_unsafe_ids(tmp_path, bundle_path, match_id):
+    assert BundleStore(str(tmp_path)).get(match_id) is None